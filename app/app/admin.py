@@ -27,3 +27,10 @@ admin.site.register(Player, PlayerAdmin)
 admin.site.register(Character, CharacterAdmin)
 admin.site.register(Artifact, ArtifactAdmin)
 admin.site.register(Substat)
+admin.site.register(EnkaResponse)
+admin.site.register(FetchLock)
+admin.site.register(NegativeResult)
+admin.site.register(AvatarIcon)
+admin.site.register(CharacterDefinition)
+admin.site.register(StatQuartiles)
+admin.site.register(CharacterVersion)
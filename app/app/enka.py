@@ -0,0 +1,183 @@
+import time
+import asyncio
+import weakref
+import threading
+import httpx
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# Setting some constants
+# ----------------------
+
+
+CONNECT_TIMEOUT = 3.05  # Seconds allowed to open a connection (TCP + TLS)
+READ_TIMEOUT = 10  # Seconds allowed between two bytes of the response
+POOL_CONNECTIONS = 4  # Number of hosts for which connections are kept alive
+POOL_MAXSIZE = 16  # Maximum number of simultaneous connections to a single host
+ASYNC_MAX_CONNECTIONS = 512  # Maximum number of simultaneous connections of the async client, which does not hold a thread per request
+HEADERS = {
+    "User-Agent": "court-of-fontaine",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "application/json",
+}
+
+
+# Keeping track of the connections
+# --------------------------------
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "errors": 0,
+    "connections_opened": 0,
+    "connections_reused": 0,
+    "handshake_seconds": 0.0,
+    "payload_seconds": 0.0,
+    "async_requests": 0,
+    "async_errors": 0,
+    "async_seconds": 0.0,
+}
+
+
+def _record(**increments) -> None:
+    with _lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """HTTP connection measuring how long it takes to be established"""
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.handshake += time.perf_counter() - start
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection measuring how long the TCP and TLS handshakes take"""
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.handshake += time.perf_counter() - start
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """Adapter whose pools are made of timed connections"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+# Building the shared session
+# ---------------------------
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = TimedAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _build_session()
+_slots = {}  # NOTE: one semaphore per host, limiting the number of simultaneous connections
+
+
+def _get_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _lock:
+        if host not in _slots:
+            _slots[host] = threading.BoundedSemaphore(POOL_MAXSIZE)
+        return _slots[host]
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the shared pool of connections"""
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    slot = _get_slot(url)
+    if not slot.acquire(timeout=READ_TIMEOUT):
+        _record(requests=1, errors=1)
+        raise requests.exceptions.ConnectTimeout(f"Too many simultaneous requests to {urlsplit(url).netloc}.")
+    _local.handshake = 0.0
+    start = time.perf_counter()
+    try:
+        response = SESSION.get(url, **kwargs)
+    except requests.RequestException:
+        _record(requests=1, errors=1)
+        raise
+    finally:
+        slot.release()
+    elapsed = time.perf_counter() - start
+    handshake = _local.handshake
+    _record(
+        requests=1,
+        connections_opened=1 if handshake > 0 else 0,
+        connections_reused=0 if handshake > 0 else 1,
+        handshake_seconds=handshake,
+        payload_seconds=elapsed - handshake,
+    )
+    return response
+
+
+# Sending requests without blocking
+# ---------------------------------
+
+
+_async_clients = weakref.WeakKeyDictionary()  # NOTE: httpx clients only work in the event loop they were created in
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAXSIZE),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    """Send a GET request from an event loop, through a pool of connections shared by its coroutines"""
+    start = time.perf_counter()
+    try:
+        response = await _get_async_client().get(url, **kwargs)
+    except httpx.HTTPError:
+        _record(async_requests=1, async_errors=1)
+        raise
+    _record(async_requests=1, async_seconds=time.perf_counter() - start)
+    return response
+
+
+def stats() -> dict:
+    """Return how often connections are reused and where the time is spent"""
+    with _lock:
+        result = dict(_stats)
+    opened = result["connections_opened"]
+    completed = opened + result["connections_reused"]
+    result["reuse_ratio"] = result["connections_reused"] / completed if completed else 0.0
+    result["average_handshake_ms"] = 1000 * result["handshake_seconds"] / opened if opened else 0.0
+    result["average_payload_ms"] = 1000 * result["payload_seconds"] / completed if completed else 0.0
+    result["average_async_ms"] = 1000 * result["async_seconds"] / result["async_requests"] if result["async_requests"] else 0.0
+    return result
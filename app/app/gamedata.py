@@ -0,0 +1,151 @@
+import os
+import json
+import pickle
+import threading
+
+
+# Setting some constants
+# ----------------------
+
+
+CONSTANTS_FOLDER = "constants"
+SNAPSHOT = os.path.join(CONSTANTS_FOLDER, "gamedata.pickle")
+LOC_SNAPSHOT = os.path.join(CONSTANTS_FOLDER, "loc.{}.pickle")
+SNAPSHOT_VERSION = 2  # NOTE: to be increased whenever the structure of the snapshots changes
+SOURCES = [
+    "AppendProp.json",
+    "EquipType.json",
+    "ReliquaryAffixExcelConfigData.json",
+    "characters.json",
+    "loc.json",
+    "pfps.json",
+]
+LOC_SOURCES = [
+    "characters.json",
+    "loc.json",
+]
+LANG = "en"  # Language in which names are stored in the database
+ICON_URL = "https://enka.network/ui/{}.png"
+
+
+# Building the registry
+# ---------------------
+
+
+def _load(name: str):
+    with open(os.path.join(CONSTANTS_FOLDER, name), encoding="utf8") as f:
+        return json.load(f)
+
+
+def _is_fresh(path: str, sources: list) -> bool:
+    if not os.path.exists(path):
+        return False
+    return os.path.getmtime(path) >= max(os.path.getmtime(os.path.join(CONSTANTS_FOLDER, name)) for name in sources)
+
+
+def _read_snapshot(path: str):
+    with open(path, "rb") as f:
+        version, content = pickle.load(f)
+    return content if version == SNAPSHOT_VERSION else None
+
+
+def _write_snapshot(path: str, content) -> None:
+    try:
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump((SNAPSHOT_VERSION, content), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+    except OSError as e:  # NOTE: the data is still usable, it will just be built again next time
+        print(f"Could not write {path} ({e}).")
+
+
+def build_locs() -> dict:
+    """Keep, for every language, only the translations of the characters' names"""
+    hashes = {str(character["NameTextMapHash"]) for character in _load("characters.json").values()}
+    locs = {}
+    for lang, texts in _load("loc.json").items():
+        locs[lang] = {name_hash: text for name_hash, text in texts.items() if name_hash in hashes}
+    for lang, loc in locs.items():
+        _write_snapshot(LOC_SNAPSHOT.format(lang), loc)
+    return locs
+
+
+def build() -> dict:
+    """Index the game data from the JSON files of the constants folder"""
+    appendprop = _load("AppendProp.json")
+    equiptype = _load("EquipType.json")
+    locs = build_locs()
+    loc = locs[LANG]
+    affixes = {}  # NOTE: affix id -> (name of the substat, value of the roll)
+    for affix in _load("ReliquaryAffixExcelConfigData.json"):
+        if affix["propType"] in appendprop:
+            affixes[affix["id"]] = (appendprop[affix["propType"]], affix["propValue"])
+    characters = {}  # NOTE: avatar id -> name, hash of the name and icon
+    for avatar_id, character in _load("characters.json").items():
+        name_hash = str(character["NameTextMapHash"])
+        if name_hash not in loc:
+            continue
+        characters[avatar_id] = {
+            "name": loc[name_hash],
+            "name_hash": name_hash,
+            "icon": ICON_URL.format("UI_AvatarIcon_" + str(character["SideIconName"]).split("_")[-1]),
+        }
+    pfps = {}  # NOTE: profile picture id -> icon
+    for pfp_id, pfp in _load("pfps.json").items():
+        pfps[pfp_id] = ICON_URL.format(pfp["iconPath"].replace("_Circle", ""))
+    return {
+        "appendprop": appendprop,
+        "equiptype": equiptype,
+        "affixes": affixes,
+        "characters": characters,
+        "names": {character["name"]: character["name_hash"] for character in characters.values()},
+        "languages": sorted(locs),
+        "pfps": pfps,
+    }
+
+
+def load() -> dict:
+    """Load the registry from its snapshot, building it first if the JSON files changed"""
+    if _is_fresh(SNAPSHOT, SOURCES):
+        registry = _read_snapshot(SNAPSHOT)
+        if registry is not None:
+            return registry
+    registry = build()
+    _write_snapshot(SNAPSHOT, registry)
+    return registry
+
+
+_registry = load()
+APPENDPROP = _registry["appendprop"]
+EQUIPTYPE = _registry["equiptype"]
+AFFIXES = _registry["affixes"]
+CHARACTERS = _registry["characters"]
+PFPS = _registry["pfps"]
+NAMES = _registry["names"]  # NOTE: name in the database -> hash of the name
+LANGUAGES = _registry["languages"]
+
+
+# Translating names, one language at a time
+# -----------------------------------------
+
+
+_locs = {}
+_locs_lock = threading.Lock()
+
+
+def get_loc(lang: str) -> dict:
+    """Get the translations of the characters' names in a language, loading them on first use"""
+    with _locs_lock:
+        if lang not in _locs:
+            path = LOC_SNAPSHOT.format(lang)
+            loc = _read_snapshot(path) if _is_fresh(path, LOC_SOURCES) else None
+            if loc is None:
+                loc = build_locs().get(lang, {})
+            _locs[lang] = loc
+        return _locs[lang]
+
+
+def translate(name: str, lang: str) -> str:
+    """Translate the name of a character, as stored in the database, into another language"""
+    if lang == LANG or lang not in LANGUAGES or name not in NAMES:
+        return name
+    return get_loc(lang).get(NAMES[name], name)
@@ -0,0 +1,141 @@
+import os
+import csv
+import gzip
+import json
+import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+
+from app.models import Player, CharacterDefinition, Character, Artifact, Substat
+
+try:  # NOTE: optional, only needed for columnar formats
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+TABLES = {  # Exported model -> filter selecting the rows changed since a date (rescores included, they set updated too)
+    "definitions": (CharacterDefinition, None),  # NOTE: small, always exported whole
+    "players": (Player, "updated__gt"),
+    "characters": (Character, "updated__gt"),
+    "artifacts": (Artifact, "updated__gt"),
+    "substats": (Substat, "owner__updated__gt"),  # NOTE: stats are written again whenever their artifact changes
+}
+STATE_FILE = "export_state.json"
+
+
+def arrow_type(field: models.Field):
+    if isinstance(field, models.ForeignKey):
+        return arrow_type(field.target_field)
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    if isinstance(field, models.DecimalField):
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp("us", tz="UTC")
+    return pyarrow.string()  # NOTE: text, URLs and JSON (serialized)
+
+
+class CSVWriter:
+    """Write batches of rows into a gzip-compressed CSV file"""
+    extension = "csv.gz"
+
+    def __init__(self, path: str, fields: list):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([field.attname for field in fields])
+
+    def write(self, rows: list) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ArrowWriter:
+    """Write batches of rows into a Parquet file (one row group per batch) or an Arrow IPC file"""
+    def __init__(self, path: str, fields: list, kind: str):
+        self.schema = pyarrow.schema([(field.attname, arrow_type(field)) for field in fields])
+        if kind == "parquet":
+            self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self.writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, rows: list) -> None:
+        columns = list(zip(*rows))
+        self.writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        ))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = "Export players, characters, artifacts and stats to Parquet, Arrow or compressed CSV files, for analysis"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=os.path.join(os.path.dirname(settings.DATABASES["default"]["NAME"]), "exports"), help="Folder in which the files are written")
+        parser.add_argument("--format", choices=["parquet", "arrow", "csv"], default="parquet" if pyarrow is not None else "csv", help="Parquet and Arrow need pyarrow to be installed")
+        parser.add_argument("--batch", type=int, default=50000, help="Rows read and written at once (and rows per Parquet row group)")
+        parser.add_argument("--incremental", action="store_true", help="Only export the rows changed since the previous export")
+        parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES), help="Tables to export")
+
+    def export(self, model, rows_filter: dict, writer, batch: int) -> int:
+        """Copy the rows of a table into a writer, one keyset-paginated batch at a time"""
+        names = [field.attname for field in model._meta.concrete_fields]
+        pk = names.index(model._meta.pk.attname)
+        json_columns = {i for i, field in enumerate(model._meta.concrete_fields) if isinstance(field, models.JSONField)}
+        queryset = model.objects.filter(**rows_filter).order_by("pk")
+        count = 0
+        cursor = None
+        while True:
+            page = queryset if cursor is None else queryset.filter(pk__gt=cursor)
+            rows = list(page.values_list(*names)[:batch])
+            if len(rows) == 0:
+                return count
+            cursor = rows[-1][pk]
+            if json_columns:
+                rows = [tuple(json.dumps(value) if i in json_columns else value for i, value in enumerate(row)) for row in rows]
+            writer.write(rows)
+            count += len(rows)
+
+    def handle(self, *args, **options):
+        if options["format"] != "csv" and pyarrow is None:
+            raise CommandError(f"pyarrow is needed to export to {options['format']}, use --format csv or install it.")
+        os.makedirs(options["output"], exist_ok=True)
+        state_path = os.path.join(options["output"], STATE_FILE)
+        since = None
+        if options["incremental"]:
+            try:
+                with open(state_path) as f:
+                    since = datetime.datetime.fromisoformat(json.load(f)["exported"])
+            except (OSError, ValueError, KeyError):
+                self.stdout.write("No previous export found, exporting everything.")
+        # NOTE: taken before reading, rows changed during the export will be part of the next one
+        started = datetime.datetime.now(tz=datetime.timezone.utc)
+        stamp = started.strftime("%Y%m%d-%H%M%S")
+        for table in options["tables"]:
+            model, since_lookup = TABLES[table]
+            fields = model._meta.concrete_fields
+            extension = {"parquet": "parquet", "arrow": "arrow", "csv": CSVWriter.extension}[options["format"]]
+            path = os.path.join(options["output"], f"{table}-{stamp}.{extension}")
+            if options["format"] == "csv":
+                writer = CSVWriter(path, fields)
+            else:
+                writer = ArrowWriter(path, fields, options["format"])
+            try:
+                count = self.export(model, {since_lookup: since} if since is not None and since_lookup is not None else {}, writer, options["batch"])
+            finally:
+                writer.close()
+            self.stdout.write(f"{count} {table} written to {path}.")
+        with open(state_path + ".tmp", "w") as f:
+            json.dump({"exported": started.isoformat(), "format": options["format"]}, f)
+        os.replace(state_path + ".tmp", state_path)
+        self.stdout.write(self.style.SUCCESS(f"Export finished{f' (changes since {since.isoformat()})' if since else ''}."))
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+
+from app import scripts
+from app.models import AvatarIcon
+
+
+class Command(BaseCommand):
+    help = "Resolve the icon of every character once, so that players are added without probing icon URLs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Number of URLs probed simultaneously")
+        parser.add_argument("--force", action="store_true", help="Resolve again the icons which already were")
+
+    def handle(self, *args, **options):
+        # NOTE: icons used as profile pictures are known to exist without asking
+        known = set(scripts.PFPS.values())
+        avatar_ids = list(scripts.CHARACTERS)
+        if not options["force"]:
+            resolved = set(AvatarIcon.objects.values_list("avatar_id", flat=True))
+            avatar_ids = [avatar_id for avatar_id in avatar_ids if avatar_id not in resolved]
+
+        def resolve(avatar_id: str) -> str:
+            candidates = scripts.icon_candidates(avatar_id)
+            for candidate in candidates:
+                if candidate in known or scripts.url_exists(candidate):
+                    return candidate
+            return candidates[-1]
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            urls = list(executor.map(resolve, avatar_ids))
+        AvatarIcon.objects.bulk_create(
+            [AvatarIcon(avatar_id=avatar_id, url=url) for avatar_id, url in zip(avatar_ids, urls)],
+            update_conflicts=True,
+            unique_fields=["avatar_id"],
+            update_fields=["url"],
+        )
+        self.stdout.write(f"Resolved {len(avatar_ids)} icons ({AvatarIcon.objects.count()} in total).")
+        scripts.ICONS_LOADED = float("-inf")  # NOTE: the catalog must be written with the icons just resolved
+        self.stdout.write(self.style.SUCCESS(f"Updated the catalog of {scripts.sync_catalog()} characters."))
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app import scoring
+
+# NOTE: workers import this module before Django is set up, models are thus only imported inside functions
+
+
+def setup_worker() -> None:
+    import django
+    django.setup()
+
+
+def rescore_chunk(ids: list[int]) -> tuple[int, int]:
+    """Compute again the ratings of some characters, in a worker process"""
+    from app import scripts
+    return len(ids), scripts.materialize_characters(ids)
+
+
+class Command(BaseCommand):
+    help = "Compute again the stored ratings of every artifact, after the scoring changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Number of processes rescoring at the same time")
+        parser.add_argument("--chunk", type=int, default=500, help="Number of characters (about 5 artifacts each) rescored at once")
+        parser.add_argument("--all", action="store_true", help="Rescore every character, not only those scored (or whose stat texts were written) by another version")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint left by a previous run")
+        parser.add_argument("--checkpoint", default=os.path.join(os.path.dirname(settings.DATABASES["default"]["NAME"]), "rescore.checkpoint"), help="File in which the progress is saved")
+
+    def read_checkpoint(self, path: str) -> int:
+        try:
+            with open(path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if checkpoint.get("version") != [scoring.SCORING_VERSION, scoring.TEXTS_VERSION]:
+            return 0
+        return checkpoint["last_id"]
+
+    def write_checkpoint(self, path: str, last_id: int) -> None:
+        with open(path + ".tmp", "w") as f:
+            json.dump({"version": [scoring.SCORING_VERSION, scoring.TEXTS_VERSION], "last_id": last_id}, f)
+        os.replace(path + ".tmp", path)
+
+    def handle(self, *args, **options):
+        from django.db import connections
+        from app.models import Character
+
+        queryset = Character.objects.all()
+        if not options["all"]:
+            queryset = queryset.exclude(scoring_version=scoring.SCORING_VERSION, texts_version=scoring.TEXTS_VERSION)
+        last_id = 0 if options["restart"] else self.read_checkpoint(options["checkpoint"])
+        total = queryset.filter(id__gt=last_id).count()
+        if last_id > 0:
+            self.stdout.write(f"Resuming after character {last_id}.")
+        self.stdout.write(f"{total} characters to rescore with version {scoring.SCORING_VERSION}.")
+
+        def next_chunk(after: int) -> list[int]:
+            # NOTE: keyset pagination, so that each chunk costs the same however far in the table it is
+            return list(queryset.filter(id__gt=after).order_by("id").values_list("id", flat=True)[:options["chunk"]])
+
+        pending = []  # NOTE: (last id, future) of the chunks in order, so that the checkpoint never skips one which is not done yet
+        finished = set()
+        characters, artifacts = 0, 0
+        start = time.perf_counter()
+        cursor = last_id
+        connections.close_all()  # NOTE: connections must not be shared with the workers
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=context, initializer=setup_worker) as executor:
+            running = set()
+            exhausted = False
+            while not exhausted or running:
+                while not exhausted and len(running) < 2 * options["workers"]:
+                    ids = next_chunk(cursor)
+                    if len(ids) == 0:
+                        exhausted = True
+                        break
+                    cursor = ids[-1]
+                    future = executor.submit(rescore_chunk, ids)
+                    pending.append((cursor, future))
+                    running.add(future)
+                if not running:
+                    break
+                completed, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    rescored_characters, rescored_artifacts = future.result()
+                    characters += rescored_characters
+                    artifacts += rescored_artifacts
+                finished |= completed
+                checkpoint = None
+                while pending and pending[0][1] in finished:
+                    checkpoint, future = pending.pop(0)
+                    finished.remove(future)
+                if checkpoint is not None:
+                    self.write_checkpoint(options["checkpoint"], checkpoint)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{characters}/{total} characters, {artifacts} artifacts "
+                    f"({artifacts / elapsed:.0f} artifacts/s, {elapsed:.1f} s)"
+                )
+        if os.path.exists(options["checkpoint"]):
+            os.remove(options["checkpoint"])
+        self.stdout.write(self.style.SUCCESS(f"Rescored {characters} characters and {artifacts} artifacts in {time.perf_counter() - start:.1f} s."))
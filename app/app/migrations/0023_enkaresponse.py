@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0022_alter_character_stat_cd_alter_character_stat_cr_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EnkaResponse",
+            fields=[
+                (
+                    "uid",
+                    models.CharField(
+                        db_index=True,
+                        max_length=9,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="UID",
+                    ),
+                ),
+                ("payload", models.TextField()),
+                ("fetched", models.DateTimeField(auto_now=True)),
+                ("expires", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
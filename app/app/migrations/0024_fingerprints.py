@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0023_enkaresponse"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artifact",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=40),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="fingerprint",
+            field=models.CharField(blank=True, default="", max_length=40),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0024_fingerprints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FetchLock",
+            fields=[
+                (
+                    "uid",
+                    models.CharField(
+                        db_index=True,
+                        max_length=9,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="UID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=32)),
+                ("acquired", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0025_fetchlock"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NegativeResult",
+            fields=[
+                (
+                    "uid",
+                    models.CharField(
+                        db_index=True,
+                        max_length=9,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                        verbose_name="UID",
+                    ),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("notfound", "Not found"),
+                            ("hidden", "Showcase hidden"),
+                            ("rejected", "Rejected by Enka.Network"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("expires", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0026_negativeresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvatarIcon",
+            fields=[
+                (
+                    "avatar_id",
+                    models.CharField(
+                        db_index=True,
+                        max_length=20,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("url", models.URLField(max_length=100)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0027_avataricon"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artifact",
+            name="rating",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="artifact",
+            name="scoring_version",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="progress",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="scoring_version",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="substat",
+            name="text",
+            field=models.CharField(blank=True, default="", max_length=30),
+        ),
+        migrations.AddField(
+            model_name="substat",
+            name="textstyle",
+            field=models.CharField(blank=True, default="", max_length=50),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0028_materialized_ratings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatQuartiles",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=20, primary_key=True, serialize=False),
+                ),
+                ("thresholds", models.JSONField(default=dict)),
+                ("count", models.IntegerField(default=0)),
+                ("pending", models.IntegerField(default=0)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
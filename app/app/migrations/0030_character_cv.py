@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:00
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def compute_cv(apps, schema_editor):
+    Character = apps.get_model("app", "Character")
+    Character.objects.update(cv=F("stat_cd") + 2 * F("stat_cr"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0029_statquartiles"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="cv",
+            field=models.DecimalField(decimal_places=1, default=0, max_digits=6),
+        ),
+        migrations.RunPython(compute_cv, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="character",
+            index=models.Index(
+                fields=["name", "-cv", "id"], name="character_leaderboard"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0030_character_cv"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artifact",
+            name="updated",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
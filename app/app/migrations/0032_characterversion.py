@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:05
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_versions(apps, schema_editor):
+    Character = apps.get_model("app", "Character")
+    CharacterVersion = apps.get_model("app", "CharacterVersion")
+    CharacterVersion.objects.bulk_create([
+        CharacterVersion(name=row["name"], updated=row["updated"])
+        for row in Character.objects.values("name").annotate(updated=Max("updated"))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0031_artifact_updated"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CharacterVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=20, primary_key=True, serialize=False),
+                ),
+                ("version", models.IntegerField(default=1)),
+                ("updated", models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0032_characterversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="player",
+            name="version",
+            field=models.IntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,168 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# NOTE: the game data when this migration was written, copied so that later changes to it do not change the migration
+CHARACTERS = [  # Avatar id, name and icon
+    ("10000002", "Kamisato Ayaka", "https://enka.network/ui/UI_AvatarIcon_Ayaka.png"),
+    ("10000003", "Jean", "https://enka.network/ui/UI_AvatarIcon_Qin.png"),
+    ("10000005", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000006", "Lisa", "https://enka.network/ui/UI_AvatarIcon_Lisa.png"),
+    ("10000007", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000014", "Barbara", "https://enka.network/ui/UI_AvatarIcon_Barbara.png"),
+    ("10000015", "Kaeya", "https://enka.network/ui/UI_AvatarIcon_Kaeya.png"),
+    ("10000016", "Diluc", "https://enka.network/ui/UI_AvatarIcon_Diluc.png"),
+    ("10000020", "Razor", "https://enka.network/ui/UI_AvatarIcon_Razor.png"),
+    ("10000021", "Amber", "https://enka.network/ui/UI_AvatarIcon_Ambor.png"),
+    ("10000022", "Venti", "https://enka.network/ui/UI_AvatarIcon_Venti.png"),
+    ("10000023", "Xiangling", "https://enka.network/ui/UI_AvatarIcon_Xiangling.png"),
+    ("10000024", "Beidou", "https://enka.network/ui/UI_AvatarIcon_Beidou.png"),
+    ("10000025", "Xingqiu", "https://enka.network/ui/UI_AvatarIcon_Xingqiu.png"),
+    ("10000026", "Xiao", "https://enka.network/ui/UI_AvatarIcon_Xiao.png"),
+    ("10000027", "Ningguang", "https://enka.network/ui/UI_AvatarIcon_Ningguang.png"),
+    ("10000029", "Klee", "https://enka.network/ui/UI_AvatarIcon_Klee.png"),
+    ("10000030", "Zhongli", "https://enka.network/ui/UI_AvatarIcon_Zhongli.png"),
+    ("10000031", "Fischl", "https://enka.network/ui/UI_AvatarIcon_Fischl.png"),
+    ("10000032", "Bennett", "https://enka.network/ui/UI_AvatarIcon_Bennett.png"),
+    ("10000033", "Tartaglia", "https://enka.network/ui/UI_AvatarIcon_Tartaglia.png"),
+    ("10000034", "Noelle", "https://enka.network/ui/UI_AvatarIcon_Noel.png"),
+    ("10000035", "Qiqi", "https://enka.network/ui/UI_AvatarIcon_Qiqi.png"),
+    ("10000036", "Chongyun", "https://enka.network/ui/UI_AvatarIcon_Chongyun.png"),
+    ("10000037", "Ganyu", "https://enka.network/ui/UI_AvatarIcon_Ganyu.png"),
+    ("10000038", "Albedo", "https://enka.network/ui/UI_AvatarIcon_Albedo.png"),
+    ("10000039", "Diona", "https://enka.network/ui/UI_AvatarIcon_Diona.png"),
+    ("10000041", "Mona", "https://enka.network/ui/UI_AvatarIcon_Mona.png"),
+    ("10000042", "Keqing", "https://enka.network/ui/UI_AvatarIcon_Keqing.png"),
+    ("10000043", "Sucrose", "https://enka.network/ui/UI_AvatarIcon_Sucrose.png"),
+    ("10000044", "Xinyan", "https://enka.network/ui/UI_AvatarIcon_Xinyan.png"),
+    ("10000045", "Rosaria", "https://enka.network/ui/UI_AvatarIcon_Rosaria.png"),
+    ("10000046", "Hu Tao", "https://enka.network/ui/UI_AvatarIcon_Hutao.png"),
+    ("10000047", "Kaedehara Kazuha", "https://enka.network/ui/UI_AvatarIcon_Kazuha.png"),
+    ("10000048", "Yanfei", "https://enka.network/ui/UI_AvatarIcon_Feiyan.png"),
+    ("10000049", "Yoimiya", "https://enka.network/ui/UI_AvatarIcon_Yoimiya.png"),
+    ("10000050", "Thoma", "https://enka.network/ui/UI_AvatarIcon_Tohma.png"),
+    ("10000051", "Eula", "https://enka.network/ui/UI_AvatarIcon_Eula.png"),
+    ("10000052", "Raiden Shogun", "https://enka.network/ui/UI_AvatarIcon_Shougun.png"),
+    ("10000053", "Sayu", "https://enka.network/ui/UI_AvatarIcon_Sayu.png"),
+    ("10000054", "Sangonomiya Kokomi", "https://enka.network/ui/UI_AvatarIcon_Kokomi.png"),
+    ("10000055", "Gorou", "https://enka.network/ui/UI_AvatarIcon_Gorou.png"),
+    ("10000056", "Kujou Sara", "https://enka.network/ui/UI_AvatarIcon_Sara.png"),
+    ("10000057", "Arataki Itto", "https://enka.network/ui/UI_AvatarIcon_Itto.png"),
+    ("10000058", "Yae Miko", "https://enka.network/ui/UI_AvatarIcon_Yae.png"),
+    ("10000059", "Shikanoin Heizou", "https://enka.network/ui/UI_AvatarIcon_Heizo.png"),
+    ("10000060", "Yelan", "https://enka.network/ui/UI_AvatarIcon_Yelan.png"),
+    ("10000061", "Kirara", "https://enka.network/ui/UI_AvatarIcon_Momoka.png"),
+    ("10000062", "Aloy", "https://enka.network/ui/UI_AvatarIcon_Aloy.png"),
+    ("10000063", "Shenhe", "https://enka.network/ui/UI_AvatarIcon_Shenhe.png"),
+    ("10000064", "Yun Jin", "https://enka.network/ui/UI_AvatarIcon_Yunjin.png"),
+    ("10000065", "Kuki Shinobu", "https://enka.network/ui/UI_AvatarIcon_Shinobu.png"),
+    ("10000066", "Kamisato Ayato", "https://enka.network/ui/UI_AvatarIcon_Ayato.png"),
+    ("10000067", "Collei", "https://enka.network/ui/UI_AvatarIcon_Collei.png"),
+    ("10000068", "Dori", "https://enka.network/ui/UI_AvatarIcon_Dori.png"),
+    ("10000069", "Tighnari", "https://enka.network/ui/UI_AvatarIcon_Tighnari.png"),
+    ("10000070", "Nilou", "https://enka.network/ui/UI_AvatarIcon_Nilou.png"),
+    ("10000071", "Cyno", "https://enka.network/ui/UI_AvatarIcon_Cyno.png"),
+    ("10000072", "Candace", "https://enka.network/ui/UI_AvatarIcon_Candace.png"),
+    ("10000073", "Nahida", "https://enka.network/ui/UI_AvatarIcon_Nahida.png"),
+    ("10000074", "Layla", "https://enka.network/ui/UI_AvatarIcon_Layla.png"),
+    ("10000075", "Wanderer", "https://enka.network/ui/UI_AvatarIcon_Wanderer.png"),
+    ("10000076", "Faruzan", "https://enka.network/ui/UI_AvatarIcon_Faruzan.png"),
+    ("10000077", "Yaoyao", "https://enka.network/ui/UI_AvatarIcon_Yaoyao.png"),
+    ("10000078", "Alhaitham", "https://enka.network/ui/UI_AvatarIcon_Alhatham.png"),
+    ("10000079", "Dehya", "https://enka.network/ui/UI_AvatarIcon_Dehya.png"),
+    ("10000080", "Mika", "https://enka.network/ui/UI_AvatarIcon_Mika.png"),
+    ("10000081", "Kaveh", "https://enka.network/ui/UI_AvatarIcon_Kaveh.png"),
+    ("10000082", "Baizhu", "https://enka.network/ui/UI_AvatarIcon_Baizhuer.png"),
+    ("10000083", "Lynette", "https://enka.network/ui/UI_AvatarIcon_Linette.png"),
+    ("10000084", "Lyney", "https://enka.network/ui/UI_AvatarIcon_Liney.png"),
+    ("10000085", "Freminet", "https://enka.network/ui/UI_AvatarIcon_Freminet.png"),
+    ("10000086", "Wriothesley", "https://enka.network/ui/UI_AvatarIcon_Wriothesley.png"),
+    ("10000087", "Neuvillette", "https://enka.network/ui/UI_AvatarIcon_Neuvillette.png"),
+    ("10000088", "Charlotte", "https://enka.network/ui/UI_AvatarIcon_Charlotte.png"),
+    ("10000089", "Furina", "https://enka.network/ui/UI_AvatarIcon_Furina.png"),
+    ("10000090", "Chevreuse", "https://enka.network/ui/UI_AvatarIcon_Chevreuse.png"),
+    ("10000091", "Navia", "https://enka.network/ui/UI_AvatarIcon_Navia.png"),
+    ("10000092", "Gaming", "https://enka.network/ui/UI_AvatarIcon_Gaming.png"),
+    ("10000093", "Xianyun", "https://enka.network/ui/UI_AvatarIcon_Liuyun.png"),
+    ("10000094", "Chiori", "https://enka.network/ui/UI_AvatarIcon_Chiori.png"),
+    ("10000095", "Sigewinne", "https://enka.network/ui/UI_AvatarIcon_Sigewinne.png"),
+    ("10000096", "Arlecchino", "https://enka.network/ui/UI_AvatarIcon_Arlecchino.png"),
+    ("10000097", "Sethos", "https://enka.network/ui/UI_AvatarIcon_Sethos.png"),
+    ("10000098", "Clorinde", "https://enka.network/ui/UI_AvatarIcon_Clorinde.png"),
+    ("10000099", "Emilie", "https://enka.network/ui/UI_AvatarIcon_Emilie.png"),
+    ("10000005-503", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000005-504", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000005-506", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000005-507", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000005-508", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000005-501", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerBoy.png"),
+    ("10000007-701", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000007-703", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000007-704", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000007-706", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000007-707", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+    ("10000007-708", "Traveler", "https://enka.network/ui/UI_AvatarIcon_PlayerGirl.png"),
+]
+
+
+def create_definitions(apps, schema_editor):
+    AvatarIcon = apps.get_model("app", "AvatarIcon")
+    Character = apps.get_model("app", "Character")
+    CharacterDefinition = apps.get_model("app", "CharacterDefinition")
+    icons = dict(AvatarIcon.objects.values_list("avatar_id", "url"))
+    definitions = [
+        CharacterDefinition(avatar_id=avatar_id, slug=name.lower().replace(" ", "_"), name=name, icon=icons.get(avatar_id, icon))
+        for avatar_id, name, icon in CHARACTERS
+    ]
+    CharacterDefinition.objects.bulk_create(definitions)
+    # NOTE: characters only stored their name and icon, the icon tells apart those sharing a name (the Travelers)
+    for name, icon in Character.objects.values_list("name", "icon").distinct():
+        candidates = [definition for definition in definitions if definition.name == name]
+        if len(candidates) == 0:
+            continue
+        definition = next((candidate for candidate in candidates if candidate.icon == icon), candidates[0])
+        Character.objects.filter(name=name, icon=icon).update(definition=definition)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0033_player_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CharacterDefinition",
+            fields=[
+                (
+                    "avatar_id",
+                    models.CharField(
+                        db_index=True,
+                        max_length=20,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("slug", models.CharField(db_index=True, max_length=30)),
+                ("name", models.CharField(max_length=20)),
+                ("icon", models.URLField(max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="definition",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                to="app.characterdefinition",
+            ),
+        ),
+        migrations.RunPython(create_definitions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="character",
+            name="icon",
+        ),
+    ]
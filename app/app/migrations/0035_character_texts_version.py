@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+def mark_texts(apps, schema_editor):
+    # NOTE: the texts of characters rated by a version of the scoring were written at the same time, as of version 1
+    Character = apps.get_model("app", "Character")
+    Character.objects.filter(scoring_version__gte=1).update(texts_version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0034_character_definition"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="texts_version",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(mark_texts, migrations.RunPython.noop),
+    ]
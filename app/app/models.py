@@ -7,13 +7,24 @@ class Player(models.Model):
     nickname = models.CharField(max_length=20)
     avatar = models.URLField(max_length=100, blank=True, null=True)
     updated = models.DateTimeField(auto_now=True)
+    version = models.IntegerField(default=1)  # NOTE: increased whenever what is shown about the player changes, unlike updated
     def __str__(self):
         return f"{self.nickname} ({self.uid})"
 
 
+class CharacterDefinition(models.Model):
+    avatar_id = models.CharField(max_length=20, primary_key=True, unique=True, db_index=True)
+    slug = models.CharField(max_length=30, db_index=True)  # NOTE: not unique, every Traveler is named the same
+    name = models.CharField(max_length=20)
+    icon = models.URLField(max_length=100)
+    def __str__(self):
+        return f"{self.name} ({self.avatar_id})"
+
+
 class Character(models.Model):
+    UNKNOWN_ICON = "https://enka.network/ui/UI_AvatarIcon_?.png"
     name = models.CharField(max_length=20)
-    icon=models.URLField(max_length=100, blank=True, null=True)
+    definition = models.ForeignKey(CharacterDefinition, blank=True, null=True, on_delete=models.PROTECT)  # NOTE: none for characters missing from the game data
     owner = models.ForeignKey(Player, on_delete=models.CASCADE)
     stat_hp = models.IntegerField(default=0)
     stat_atk = models.IntegerField(default=0)
@@ -23,6 +34,16 @@ class Character(models.Model):
     stat_er = models.DecimalField(default=0, max_digits=5, decimal_places=1)
     stat_em = models.IntegerField(default=0)
     updated = models.DateTimeField(auto_now=True)
+    fingerprint = models.CharField(max_length=40, blank=True, default="")
+    progress = models.JSONField(default=dict)
+    scoring_version = models.IntegerField(default=0)
+    texts_version = models.IntegerField(default=0)  # NOTE: version of the texts of the stats of its artifacts
+    cv = models.DecimalField(default=0, max_digits=6, decimal_places=1)  # NOTE: stat_cd + 2 * stat_cr, stored to be sorted by the database
+    class Meta:
+        indexes = [models.Index(fields=["name", "-cv", "id"], name="character_leaderboard")]
+    @property
+    def icon(self):
+        return self.definition.icon if self.definition_id is not None else self.UNKNOWN_ICON
     def __str__(self):
         return f"[{self.owner}] {self.name}"
 
@@ -37,6 +58,10 @@ class Artifact(models.Model):
     ])
     level = models.IntegerField(default=0)
     owner = models.ForeignKey(Character, on_delete=models.CASCADE)
+    fingerprint = models.CharField(max_length=40, blank=True, default="")
+    rating = models.JSONField(default=dict)
+    scoring_version = models.IntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
     def __str__(self):
         return f"{self.owner}'s {self.equiptype}"
     
@@ -67,7 +92,66 @@ class Substat(models.Model):
     value = models.DecimalField(max_digits=5, decimal_places=1)
     rolls = models.IntegerField(default=0)
     ismainstat = models.BooleanField(default=False)
+    text = models.CharField(max_length=30, blank=True, default="")
+    textstyle = models.CharField(max_length=50, blank=True, default="")
     owner = models.ForeignKey(Artifact, related_name="substats", on_delete=models.CASCADE)
     def __str__(self):
         return f"{self.owner} -> {self.name}"
 
+
+
+class EnkaResponse(models.Model):
+    uid = models.CharField(verbose_name="UID", max_length=9, primary_key=True, unique=True, db_index=True)
+    payload = models.TextField()
+    fetched = models.DateTimeField(auto_now=True)
+    expires = models.DateTimeField(db_index=True)
+    def __str__(self):
+        return f"Response for {self.uid} (expires {self.expires})"
+
+
+class FetchLock(models.Model):
+    uid = models.CharField(verbose_name="UID", max_length=9, primary_key=True, unique=True, db_index=True)
+    token = models.CharField(max_length=32)
+    acquired = models.DateTimeField()
+    def __str__(self):
+        return f"Fetching {self.uid} since {self.acquired}"
+
+
+class NegativeResult(models.Model):
+    NOT_FOUND = "notfound"
+    HIDDEN = "hidden"
+    REJECTED = "rejected"
+    uid = models.CharField(verbose_name="UID", max_length=9, primary_key=True, unique=True, db_index=True)
+    reason = models.CharField(max_length=10, choices=[
+        (NOT_FOUND, "Not found"),
+        (HIDDEN, "Showcase hidden"),
+        (REJECTED, "Rejected by Enka.Network"),
+    ])
+    expires = models.DateTimeField(db_index=True)
+    def __str__(self):
+        return f"{self.uid}: {self.reason} (until {self.expires})"
+
+
+class AvatarIcon(models.Model):
+    avatar_id = models.CharField(max_length=20, primary_key=True, unique=True, db_index=True)
+    url = models.URLField(max_length=100)
+    def __str__(self):
+        return f"{self.avatar_id} -> {self.url}"
+
+
+class StatQuartiles(models.Model):
+    name = models.CharField(max_length=20, primary_key=True)
+    thresholds = models.JSONField(default=dict)  # NOTE: stat -> [first quartile, third quartile] among the owners
+    count = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)  # NOTE: characters added or changed since the thresholds were computed
+    updated = models.DateTimeField(auto_now=True)
+    def __str__(self):
+        return f"{self.name} ({self.count} owners)"
+
+
+class CharacterVersion(models.Model):
+    name = models.CharField(max_length=20, primary_key=True)
+    version = models.IntegerField(default=1)  # NOTE: increased whenever the owners of a character (or what is shown about them) change
+    updated = models.DateTimeField()
+    def __str__(self):
+        return f"{self.name} (version {self.version})"
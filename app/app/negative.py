@@ -0,0 +1,110 @@
+import time
+import hashlib
+import datetime
+import threading
+
+from .models import NegativeResult
+
+
+# Setting some constants
+# ----------------------
+
+
+TTLS = {  # Seconds during which a UID is not asked again to Enka.Network, depending on why it failed
+    NegativeResult.NOT_FOUND: 6 * 3600,
+    NegativeResult.HIDDEN: 15 * 60,
+    NegativeResult.REJECTED: 7 * 24 * 3600,
+}
+MESSAGES = {
+    NegativeResult.NOT_FOUND: "No player seems to have the UID '{uid}'.",
+    NegativeResult.HIDDEN: "It seems that the player with UID '{uid}' don't want to be judged.",
+    NegativeResult.REJECTED: "Enka.Network does not accept '{uid}' as a UID.",
+}
+STATUS_REASONS = {  # Status codes of Enka.Network which say something about the UID itself
+    400: NegativeResult.REJECTED,
+    404: NegativeResult.NOT_FOUND,
+}
+FILTER_BITS = 2 ** 20  # 128 KiB, which keeps false positives around 1% up to ~100k UIDs
+FILTER_HASHES = 7
+FILTER_REBUILD = 300  # Seconds after which the filter is rebuilt, dropping expired UIDs and adding other workers' ones
+
+
+# Filtering UIDs in memory
+# ------------------------
+
+
+class BloomFilter:
+    """Set of strings which can only answer "maybe" or "certainly not", using a fixed amount of memory"""
+    def __init__(self, bits: int = FILTER_BITS, hashes: int = FILTER_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self.array = bytearray(bits // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.array[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.array[position // 8] & (1 << (position % 8)) for position in self._positions(key))
+
+
+_lock = threading.Lock()
+_filter = None
+_built = 0.0
+STATS = {"lookups": 0, "filtered": 0, "hits": 0, "stored": 0}
+
+
+def _get_filter() -> BloomFilter:
+    global _filter, _built
+    with _lock:
+        if _filter is None or time.monotonic() - _built > FILTER_REBUILD:
+            now = datetime.datetime.now(tz=datetime.timezone.utc)
+            NegativeResult.objects.filter(expires__lte=now).delete()
+            bloom = BloomFilter()
+            for uid in NegativeResult.objects.values_list("uid", flat=True).iterator():
+                bloom.add(uid)
+            _filter, _built = bloom, time.monotonic()
+        return _filter
+
+
+# Remembering UIDs which failed
+# -----------------------------
+
+
+def lookup(uid: int) -> str | None:
+    """Get the reason why a UID recently failed, if it did"""
+    STATS["lookups"] += 1
+    if str(uid) not in _get_filter():
+        STATS["filtered"] += 1
+        return None
+    reason = NegativeResult.objects.filter(
+        uid=str(uid),
+        expires__gt=datetime.datetime.now(tz=datetime.timezone.utc),
+    ).values_list("reason", flat=True).first()
+    if reason is not None:
+        STATS["hits"] += 1
+    return reason
+
+
+def remember(uid: int, reason: str) -> None:
+    """Avoid asking Enka.Network about a UID which failed, for a while"""
+    STATS["stored"] += 1
+    expires = datetime.datetime.now(tz=datetime.timezone.utc) + datetime.timedelta(seconds=TTLS[reason])
+    if NegativeResult.objects.filter(uid=str(uid)).update(reason=reason, expires=expires) == 0:
+        NegativeResult.objects.get_or_create(uid=str(uid), defaults={"reason": reason, "expires": expires})
+    _get_filter().add(str(uid))
+
+
+def classify(raw_data: dict) -> str | None:
+    """Tell why a response of Enka.Network cannot be used, if it cannot"""
+    if "playerInfo" not in raw_data:
+        return NegativeResult.NOT_FOUND
+    if "avatarInfoList" not in raw_data or not isinstance(raw_data["avatarInfoList"], list):
+        return NegativeResult.HIDDEN
+    return None
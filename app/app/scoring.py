@@ -0,0 +1,116 @@
+import numpy as np
+
+
+# Setting some constants
+# ----------------------
+
+
+SCORING_VERSION = 1  # NOTE: to be increased whenever ratings or progress are computed differently
+TEXTS_VERSION = 1  # NOTE: to be increased whenever stat texts are written differently (by scripts.describe_stat)
+RATINGS = [0.30, 0.50, 0.70, 0.90]
+RATING_NAMES = ["terrible", "bad", "decent", "good", "excellent"]  # NOTE: one more than RATINGS, from worst to best
+RATING_COLORS = [
+    {"textcolor": "white", "bgcolor": "red-600", "tttextcolor": "red-700", "tttextweight": "bold"},
+    {"textcolor": "red-700", "bgcolor": "red-200", "tttextcolor": "red-700", "tttextweight": "normal"},
+    {"textcolor": "black", "bgcolor": "transparent", "tttextcolor": "black", "tttextweight": "normal"},
+    {"textcolor": "green-700", "bgcolor": "green-200", "tttextcolor": "green-700", "tttextweight": "normal"},
+    {"textcolor": "white", "bgcolor": "green-600", "tttextcolor": "green-700", "tttextweight": "bold"},
+]
+BAD_SUBSTATS = ["Flat HP", "Flat ATK", "Flat DEF"]
+AVERAGE_SUBSTATS = ["HP%", "DEF%", "ATK%", "Elemental Mastery", "Energy Recharge"]
+GOOD_SUBSTATS = ["Crit DMG", "Crit RATE"]
+COLUMNS = BAD_SUBSTATS + AVERAGE_SUBSTATS + GOOD_SUBSTATS  # NOTE: other stats (DMG bonuses, healing) are never scored
+AVERAGE_COLUMNS = slice(len(BAD_SUBSTATS), len(BAD_SUBSTATS) + len(AVERAGE_SUBSTATS))
+GOOD_COLUMNS = slice(len(BAD_SUBSTATS) + len(AVERAGE_SUBSTATS), len(COLUMNS))
+CRIT_DMG = COLUMNS.index("Crit DMG")
+CRIT_RATE = COLUMNS.index("Crit RATE")
+_column_of = {name: column for column, name in enumerate(COLUMNS)}
+
+
+# Scoring artifacts in batches
+# ----------------------------
+
+
+def bucket(rating: float) -> int:
+    """Return the index of a rating in RATING_NAMES and RATING_COLORS"""
+    return int(np.searchsorted(RATINGS, rating, side="right"))
+
+
+def tabulate(owners, names, values, rolls, size: int) -> dict:
+    """Turn a flat list of stats into one row of counts, rolls and values per artifact"""
+    owners = np.asarray(owners, dtype=np.int64)
+    columns = np.fromiter((_column_of.get(name, -1) for name in names), dtype=np.int64, count=len(owners))
+    kept = columns >= 0
+    cells = owners[kept] * len(COLUMNS) + columns[kept]
+    length = size * len(COLUMNS)
+    # NOTE: values have a single decimal, counting them in tenths keeps sums exact, as with Decimal
+    tenths = np.rint(np.asarray(values, dtype=np.float64)[kept] * 10)
+    return {
+        "counts": np.bincount(cells, minlength=length).reshape(size, len(COLUMNS)),
+        "rolls": np.bincount(cells, weights=np.asarray(rolls, dtype=np.float64)[kept], minlength=length).reshape(size, len(COLUMNS)).astype(np.int64),
+        "tenths": np.bincount(cells, weights=tenths, minlength=length).reshape(size, len(COLUMNS)).astype(np.int64),
+    }
+
+
+def _map_range(x, x1, x2):
+    return (x - x1) * (1 - 0) / (x2 - x1) + 0  # NOTE: same operations as map_range, so that floats are identical
+
+
+def _round_to_tenth(x):
+    return 0.1 * np.round(x / 0.1)  # NOTE: rounds half to even, like round()
+
+
+def score(table: dict, circlets) -> dict:
+    """Compute the substats, rolls, crit value and overall scores of a batch of artifacts"""
+    circlets = np.asarray(circlets, dtype=bool)
+    counts, rolls, tenths = table["counts"], table["rolls"], table["tenths"]
+    good_count = counts[:, GOOD_COLUMNS].sum(axis=1)
+    average_count = np.minimum(1, counts[:, AVERAGE_COLUMNS].sum(axis=1))  # Only at most 1 average substat is counted
+    substats_score = _round_to_tenth(_map_range((2 * good_count + average_count).astype(np.float64), 1, 5))
+    good_rolls = rolls[:, GOOD_COLUMNS].sum(axis=1)
+    average_rolls = rolls[:, AVERAGE_COLUMNS].max(axis=1)  # Counting only the substat with the most rolls
+    rolls_score = _round_to_tenth(_map_range((2 * good_rolls + average_rolls).astype(np.float64), 1, np.where(circlets, 13, 15)))
+    cv = (tenths[:, CRIT_DMG] + 2 * tenths[:, CRIT_RATE]) / 10
+    cv_score = _round_to_tenth(_map_range(cv, 0, np.where(circlets, 100, 50)))
+    overall = np.sort(np.stack([substats_score, rolls_score, cv_score], axis=1), axis=1)[:, 1]
+    return {
+        "substats": substats_score,
+        "rolls": rolls_score,
+        "cv": cv_score,
+        "score": overall,
+    }
+
+
+def describe(scores: dict) -> list[dict]:
+    """Write the ratings of a batch of artifacts the way they are shown, tooltips included"""
+    columns = {key: values.tolist() for key, values in scores.items()}
+    buckets = {key: np.searchsorted(RATINGS, values, side="right").tolist() for key, values in scores.items()}
+    ratings = []
+    for i, value in enumerate(columns["score"]):
+        tooltips = []
+        for key, label in [("substats", "substats"), ("rolls", "rolls"), ("cv", "crit value")]:
+            colors = RATING_COLORS[buckets[key][i]]
+            if colors["tttextcolor"] is not None:
+                tooltips.append({
+                    "value": columns[key][i],
+                    "text": f"{RATING_NAMES[buckets[key][i]].capitalize()} {label}",
+                    "textcolor": colors["tttextcolor"],
+                    "textweight": colors["tttextweight"],
+                })
+        colors = RATING_COLORS[buckets["score"][i]]
+        ratings.append({
+            "value": value,
+            "text": RATING_NAMES[buckets["score"][i]].capitalize(),
+            "textcolor": colors["textcolor"],
+            "bgcolor": colors["bgcolor"],
+            "tooltips": tooltips,
+        })
+    return ratings
+
+
+def rate_artifacts(equiptypes: list[str], owners, names, values, rolls) -> list[dict]:
+    """Rate a batch of artifacts, given their types and the flat list of their stats (main stat included)"""
+    if len(equiptypes) == 0:
+        return []
+    table = tabulate(owners, names, values, rolls, len(equiptypes))
+    return describe(score(table, [equiptype == "Circlet" for equiptype in equiptypes]))
@@ -1,35 +1,106 @@
 import json
+import time
+import random
+import collections
+import uuid
+import hashlib
+import threading
 import requests
 import logging
 import datetime
-from django.db.models import Prefetch
+import decimal
+import asyncio
+import httpx
+from asgiref.sync import sync_to_async
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError, as_completed, wait
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Prefetch, Q
 
 from .models import *
+from . import enka
+from . import negative
+from . import gamedata
+from . import scoring
 
 
 # Setting some constants
 # ----------------------
 
 
-RATINGS = [0.30, 0.50, 0.70, 0.90]
+RATINGS = scoring.RATINGS
 SAVE_FOLDER = "saved"
-LANG = "en"
-BAD_SUBSTATS = ["Flat HP", "Flat ATK", "Flat DEF"]
-AVERAGE_SUBSTATS = ["HP%", "DEF%", "ATK%", "Elemental Mastery", "Energy Recharge"]
-GOOD_SUBSTATS = ["Crit DMG", "Crit RATE"]
+BAD_SUBSTATS = scoring.BAD_SUBSTATS
+AVERAGE_SUBSTATS = scoring.AVERAGE_SUBSTATS
+GOOD_SUBSTATS = scoring.GOOD_SUBSTATS
 BASE_URL = "https://enka.network/api/uid"
+DEFAULT_TTL = 60  # Seconds during which a response is considered fresh, when Enka.Network does not tell
+CHARACTER_STATS = ["stat_hp", "stat_atk", "stat_def", "stat_cr", "stat_cd", "stat_er", "stat_em"]
+QUARTILES_TOLERANCE = 0.01  # Share of a character's owners which may change before its quartiles are computed again
+PAGE_SIZE = 100  # Owners of a character shown at once
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK = 2000  # Rows fetched at once from the database when exporting
+UPDATE_BATCH = 500  # Rows written by a single UPDATE when storing ratings
+DUEL_TTL = 3600  # Seconds during which a duel is kept, although it is never served once either player changed
 
 
 # Loading some constants
 # ----------------------
 
 
-CHARACTERS = json.load(open('constants/characters.json'))
-LOC = json.load(open('constants/loc.json', encoding="utf8"))
-PFPS = json.load(open('constants/pfps.json'))
-EQUIPTYPE = json.load(open('constants/EquipType.json'))
-APPENDPROP = json.load(open('constants/AppendProp.json'))
-RELIQUARYAFFIXEXCELCONFIGDATA = json.load(open('constants/ReliquaryAffixExcelConfigData.json'))
+CHARACTERS = gamedata.CHARACTERS
+PFPS = gamedata.PFPS
+EQUIPTYPE = gamedata.EQUIPTYPE
+APPENDPROP = gamedata.APPENDPROP
+AFFIXES = gamedata.AFFIXES
+
+
+# Resolving icons
+# ---------------
+
+
+ICONS = {}  # NOTE: URLs of the icons of the characters, by avatar id
+ICONS_LOADED = float("-inf")
+ICONS_RELOAD = 600  # Seconds after which the icons are read again from the database
+DEFINED = set()  # NOTE: avatar ids known to be in the catalog of characters, which never loses any
+
+
+# Keeping track of the cache
+# --------------------------
+
+
+CACHE_STATS = {"hits": 0, "misses": 0}
+RESPONSES_PURGE = 600  # Seconds between two deletions of the responses of Enka.Network which expired
+RESPONSES_PURGED = float("-inf")
+
+
+# Refreshing players in the background
+# ------------------------------------
+
+
+REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=settings.REFRESH_WORKERS, thread_name_prefix="refresh")
+REFRESH_LOCK = threading.Lock()
+REFRESHES = {}  # NOTE: refreshes running in this process, by UID
+RESCORES = set()  # NOTE: characters whose ratings are being stored in the background, by id
+ASYNC_REFRESHES = {}  # NOTE: refreshes running in the event loop, by UID
+ASYNC_TASKS = set()  # NOTE: other work running in the event loop
+FETCH_LOCK_LEASE = 30  # Seconds after which a fetch is considered dead and its lock can be taken over
+FETCH_LOCK_POLL = 0.2  # Seconds between two checks while waiting for someone else's fetch
+
+
+# Finding random players
+# ----------------------
+
+
+RANDOM_POOL_SIZE = 20  # Number of random players kept ready to be judged
+RANDOM_POOL_LOW = 5  # Number of random players under which the pool is filled again
+RANDOM_PROBE_BUDGET = 60  # Maximum number of random UIDs tried when filling the pool
+RANDOM_PROBE_WORKERS = 6  # Number of random UIDs tried simultaneously
+RANDOM_POOL = collections.deque(maxlen=RANDOM_POOL_SIZE)
+RANDOM_LOCK = threading.Lock()
+RANDOM_STATS = {"fills": 0, "probes": 0, "public": 0, "found": 0}
+PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=RANDOM_PROBE_WORKERS, thread_name_prefix="probe")
 
 
 # General purpose functions
@@ -97,16 +168,7 @@ def round_to_multiple(x, multiple):
 
 
 def rating2str(rating: float) -> str:
-    if rating < RATINGS[0]:
-        return "terrible"
-    elif rating < RATINGS[1]:
-        return "bad"
-    elif rating < RATINGS[2]:
-        return "decent"
-    elif rating < RATINGS[3]:
-        return "good"
-    else:
-        return "excellent"
+    return scoring.RATING_NAMES[scoring.bucket(rating)]
 
 
 def rating2emoji(rating: float) -> str:
@@ -123,49 +185,19 @@ def rating2emoji(rating: float) -> str:
 
 
 def rating2colors(rating: float) -> dict:
-    if rating < RATINGS[0]:
-        return {
-            "textcolor": "white",
-            "bgcolor": "red-600",
-            "tttextcolor": "red-700",
-            "tttextweight": "bold",
-        }
-    elif rating < RATINGS[1]:
-        return {
-            "textcolor": "red-700",
-            "bgcolor": "red-200",
-            "tttextcolor": "red-700",
-            "tttextweight": "normal",
-        }
-    elif rating < RATINGS[2]:
-        return {
-            "textcolor": "black",
-            "bgcolor": "transparent",
-            "tttextcolor": "black",
-            "tttextweight": "normal",
-        }
-    elif rating < RATINGS[3]:
-        return {
-            "textcolor": "green-700",
-            "bgcolor": "green-200",
-            "tttextcolor": "green-700",
-            "tttextweight": "normal",
-        }
-    else:
-        return {
-            "textcolor": "white",
-            "bgcolor": "green-600",
-            "tttextcolor": "green-700",
-            "tttextweight": "bold",
-        }
+    return dict(scoring.RATING_COLORS[scoring.bucket(rating)])
+
 
+def quartiles(values: list) -> tuple[float, float]:
+    """Return the first and third quartiles of a list"""
+    values = sorted(values)  # NOTE: sorting once, centile is then linear on a sorted list
+    return float(centile(values, 0.25)), float(centile(values, 0.75))
 
-def get_style(value: float | str, values: list) -> str:
-    if isinstance(value, str):
-        value = float(value)
-    if value < centile(values, 0.25):
+
+def get_style(value: float | str, thresholds: tuple[float, float]) -> str:
+    if float(value) < thresholds[0]:
         return "italic text-opacity-30 text-black"
-    elif value > centile(values, 0.75):
+    elif float(value) > thresholds[1]:
         return "font-bold"
     else:
         return ""
@@ -174,22 +206,65 @@ def get_style(value: float | str, values: list) -> str:
 def interrogate_enka(uid: int, summary_only: bool = False) -> dict:
     """Get the informations from Enka.Network"""
     print(f"Asking Enka.Network for UID {uid}...")
-    if not summary_only:
-        response = requests.get(f"{BASE_URL}/{uid}")
-        if response.status_code != 200:
-            print(f"Response code {response.status_code}.")
-            return response.json()
-        data = response.json()
-        print(f"Response received!")
-        return data
-    else:
-        response = requests.get(f"{BASE_URL}/{uid}?info")
-        if response.status_code != 200:
-            print(f"Response code {response.status_code}.")
-            return response.json()
+    url = f"{BASE_URL}/{uid}?info" if summary_only else f"{BASE_URL}/{uid}"
+    try:
+        response = enka.get(url)
+    except requests.RequestException as e:
+        print(f"Request failed ({e.__class__.__name__}).")
+        raise AssertionError(f"Enka.Network did not answer for UID '{uid}', please try again later.")
+    return read_enka_response(uid, response, summary_only)
+
+
+def read_enka_response(uid: int, response, summary_only: bool = False) -> dict:
+    """Decode a response of Enka.Network (from requests or httpx), remembering what it says about the UID"""
+    if response.status_code != 200:
+        print(f"Response code {response.status_code}.")
+        if response.status_code in negative.STATUS_REASONS:
+            reason = negative.STATUS_REASONS[response.status_code]
+            negative.remember(uid, reason)
+            raise AssertionError(negative.MESSAGES[reason].format(uid=uid))
+        # NOTE: rate limits, maintenances and server errors say nothing about the UID, which must not be remembered
+        raise AssertionError(f"Enka.Network did not answer for UID '{uid}', please try again later.")
+    try:
         data = response.json()
-        print(f"Response received!")
-        return data
+    except ValueError as e:
+        print(f"Request failed ({e.__class__.__name__}).")
+        raise AssertionError(f"Enka.Network did not answer for UID '{uid}', please try again later.")
+    print(f"Response received!")
+    if not summary_only:
+        store_response(uid, response.text, data)
+    return data
+
+
+def store_response(uid: int, text: str, data: dict) -> None:
+    """Keep a raw response from Enka.Network until it expires"""
+    ttl = data.get("ttl", DEFAULT_TTL) if isinstance(data, dict) else DEFAULT_TTL
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    fields = {"payload": text, "fetched": now, "expires": now + datetime.timedelta(seconds=ttl)}
+    if EnkaResponse.objects.filter(uid=str(uid)).update(**fields) == 0:
+        try:
+            EnkaResponse.objects.create(uid=str(uid), **fields)
+        except IntegrityError:  # NOTE: stored by another thread in the meantime
+            EnkaResponse.objects.filter(uid=str(uid)).update(**fields)
+    if time.monotonic() - RESPONSES_PURGED > RESPONSES_PURGE:
+        purge_responses()
+
+
+def purge_responses() -> int:
+    """Delete the responses of Enka.Network which expired, and tell how many there were"""
+    global RESPONSES_PURGED
+    RESPONSES_PURGED = time.monotonic()
+    # NOTE: there is a single response per UID, but those of UIDs never asked again would otherwise be kept forever
+    deleted, _ = EnkaResponse.objects.filter(expires__lte=datetime.datetime.now(tz=datetime.timezone.utc)).delete()
+    return deleted
+
+
+def get_cached_response(uid: int) -> EnkaResponse | None:
+    """Get the response of Enka.Network for a UID, if it did not expire yet"""
+    return EnkaResponse.objects.filter(
+        uid=str(uid),
+        expires__gt=datetime.datetime.now(tz=datetime.timezone.utc),
+    ).defer("payload").first()
 
 
 def get_character_hp(fightPropMap: dict) -> float:
@@ -216,115 +291,803 @@ def get_character_def(fightPropMap: dict) -> float:
     return base_def * (1 + def_percent) + def_flat
 
 
+def fingerprint(*values) -> str:
+    """Summarize some values in a short string which changes whenever one of them does"""
+    return hashlib.sha1(repr(values).encode()).hexdigest()
+
+
+def parse_artifact(artifact: dict) -> dict | None:
+    """Extract the fields of an artifact (and its stats) from Enka.Network's format"""
+    artifact_obj = artifact["flat"]
+    if "equipType" not in artifact_obj:
+        return None  # NOTE: weapons are stored as artifacts
+    parsed = {
+        "equiptype": EQUIPTYPE[artifact_obj["equipType"]],
+        "level": artifact_obj["rankLevel"] * 4,
+        "stats": [{
+            "name": APPENDPROP[artifact_obj["reliquaryMainstat"]["mainPropId"]],
+            "value": artifact_obj["reliquaryMainstat"]["statValue"],
+            "rolls": 0,
+            "ismainstat": True,
+        }],
+    }
+    if "appendPropIdList" in artifact['reliquary']:  # NOTE: This is not the case when a low quality artifact has no substats.
+        rolls = collections.Counter(AFFIXES[roll_id][0] for roll_id in artifact['reliquary']['appendPropIdList'])
+        for substat in artifact_obj["reliquarySubstats"]:  # NOTE: usually 4
+            substat_name = APPENDPROP[substat["appendPropId"]]
+            parsed["stats"].append({
+                "name": substat_name,
+                "value": substat["statValue"],
+                "rolls": rolls[substat_name],
+                "ismainstat": False,
+            })
+    parsed["fingerprint"] = fingerprint(
+        parsed["equiptype"],
+        parsed["level"],
+        [(stat["name"], stat["value"], stat["rolls"], stat["ismainstat"]) for stat in parsed["stats"]],
+    )
+    return parsed
+
+
+def parse_character(character_obj: dict) -> dict | None:
+    """Extract the fields of a character (and its artifacts) from Enka.Network's format"""
+    avatar_id = str(character_obj["avatarId"])
+    if avatar_id in CHARACTERS:
+        character_name = CHARACTERS[avatar_id]["name"]
+        definition_id = avatar_id
+    else:
+        character_name = "???"
+        definition_id = None
+    try:
+        fields = {
+            "name": character_name,
+            "definition_id": definition_id,  # NOTE: the icon is read from the catalog
+            "stat_hp": get_character_hp(character_obj["fightPropMap"]),
+            "stat_atk": get_character_atk(character_obj["fightPropMap"]),
+            "stat_def": get_character_def(character_obj["fightPropMap"]),
+            "stat_cr": character_obj["fightPropMap"]["20"] * 100,
+            "stat_cd": character_obj["fightPropMap"]["22"] * 100,
+            "stat_er": character_obj["fightPropMap"]["23"] * 100,
+            "stat_em": character_obj["fightPropMap"]["28"],
+        }
+    except KeyError:  # Should only happen after a new character is released
+        print(f"Character {character_obj['avatarId']} not found in constants/characters.json. Skipping.")
+        return None
+    artifacts = [parse_artifact(artifact) for artifact in character_obj["equipList"]]  # NOTE: usually 5
+    return {
+        "fields": fields,
+        "fingerprint": fingerprint(*fields.values()),
+        "artifacts": [artifact for artifact in artifacts if artifact is not None],
+    }
+
+
+def acquire_fetch_lock(uid: int) -> str | None:
+    """Try to become the only one fetching a UID, across threads and processes"""
+    token = uuid.uuid4().hex
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    try:
+        FetchLock.objects.create(uid=str(uid), token=token, acquired=now)
+        return token
+    except IntegrityError:
+        # NOTE: a lock older than its lease was left by a fetch which did not finish, it can be taken over
+        expired = now - datetime.timedelta(seconds=FETCH_LOCK_LEASE)
+        if FetchLock.objects.filter(uid=str(uid), acquired__lt=expired).update(token=token, acquired=now) == 1:
+            return token
+        return None
+
+
+def release_fetch_lock(uid: int, token: str) -> None:
+    """Let others fetch a UID again"""
+    FetchLock.objects.filter(uid=str(uid), token=token).delete()
+
+
+def wait_for_fetch_lock(uid: int) -> None:
+    """Wait until nobody is fetching a UID anymore"""
+    while True:
+        expired = datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(seconds=FETCH_LOCK_LEASE)
+        if not FetchLock.objects.filter(uid=str(uid), acquired__gte=expired).exists():
+            return
+        time.sleep(FETCH_LOCK_POLL)
+
+
 def add_player(uid: int, return_avatar: bool = False) -> None:
     """Get the informations in a human-readable format"""
-    db_player = Player.objects.filter(uid=uid).first()
-    if db_player is not None and db_player.updated > datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(seconds=60):
-        return
-    raw_data = interrogate_enka(uid)
+    reason = negative.lookup(uid)
+    assert reason is None, negative.MESSAGES[reason].format(uid=uid)
+    while True:
+        if is_up_to_date(uid):
+            return  # NOTE: nothing changed since the last time the player was added
+        token = acquire_fetch_lock(uid)
+        if token is not None:
+            break
+        wait_for_fetch_lock(uid)  # NOTE: someone else is already fetching this UID, its result will be used
+    try:
+        cached, db_player_exists = read_cached_player(uid)
+        if cached is not None and db_player_exists:
+            return  # NOTE: added by someone else right before the lock was acquired
+        if cached is not None:
+            raw_data = json.loads(cached.payload)  # NOTE: the response was stored without being added
+        else:
+            raw_data = interrogate_enka(uid)
+        store_player(uid, raw_data, db_player_exists)
+    finally:
+        release_fetch_lock(uid, token)
+
+
+def is_up_to_date(uid: int) -> bool:
+    if get_cached_response(uid) is not None and Player.objects.filter(uid=uid).exists():
+        CACHE_STATS["hits"] += 1
+        return True
+    return False
+
+
+def read_cached_player(uid: int) -> tuple[EnkaResponse | None, bool]:
+    """Get the stored response of Enka.Network for a UID if it did not expire, and whether the player is known"""
+    cached = get_cached_response(uid)
+    db_player_exists = Player.objects.filter(uid=uid).exists()
+    CACHE_STATS["misses" if cached is None else "hits"] += 1
+    return cached, db_player_exists
+
+
+def store_player(uid: int, raw_data: dict, db_player_exists: bool) -> None:
+    reason = negative.classify(raw_data)
+    if reason is not None and not db_player_exists:
+        negative.remember(uid, reason)
+    ingest_player(uid, raw_data)
+
+
+def ingest_player(uid: int, raw_data: dict) -> None:
+    """Write a player from Enka.Network's response in the database"""
     assert "playerInfo" in raw_data, f"No player seems to have the UID '{uid}'."
     assert "avatarInfoList" in raw_data and isinstance(raw_data["avatarInfoList"], list), f"It seems that the player with UID '{uid}' don't want to be judged."
     nickname = raw_data['playerInfo']['nickname']
-    names = []
-    characters_to_insert = []
-    artifacts_to_insert = []
-    substats_to_insert = []
-    artifacts_to_drop = []
-    characters_to_drop = []
     # Get avatar
     avatar = get_avatar(raw_data)
-    print(type(uid))
     if uid == "703047530":
         avatar = "/static/eastereggs/soleil.png"
     elif uid == "606062036":
         avatar = "/static/eastereggs/eiko.png"
-    if db_player is None:
-        db_player = Player.objects.create(
-            uid=uid,
-            nickname=nickname,
-            avatar=avatar
-        )
-    else:
-        db_player.nickname = nickname
-        db_player.avatar = avatar
-        db_player.save()
-    for character_index in range(len(raw_data["avatarInfoList"])):  # NOTE: usually 8
-        character_obj: dict = raw_data["avatarInfoList"][character_index]
-        if str(character_obj["avatarId"]) in CHARACTERS:
-            character_name = LOC[LANG][str(CHARACTERS[str(character_obj["avatarId"])]["NameTextMapHash"])]
+    characters = [parse_character(character_obj) for character_obj in raw_data["avatarInfoList"]]  # NOTE: usually 8
+    characters = [character for character in characters if character is not None]
+    with transaction.atomic():
+        # NOTE: starting with a write makes SQLite wait for other writers, instead of failing when upgrading a read lock
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        renamed = Player.objects.filter(uid=uid).exclude(nickname=nickname, avatar=avatar).update(nickname=nickname, avatar=avatar, updated=now) > 0
+        created = False
+        if not renamed and Player.objects.filter(uid=uid).update(updated=now) == 0:
+            db_player = Player.objects.create(uid=uid, nickname=nickname, avatar=avatar)
+            created = True
         else:
-            character_name = "???"
-        names.append(character_name)
-        if str(character_obj["avatarId"]) in CHARACTERS:
-            character_icon = "https://enka.network/ui/UI_AvatarIcon_{}.png".format(
-                str(CHARACTERS[str(character_obj["avatarId"])]["SideIconName"]).split("_")[-1])
+            db_player = Player.objects.get(uid=uid)
+        changed = write_characters(db_player, characters)
+        if renamed:  # NOTE: owners are shown with their nickname and avatar next to each of their characters
+            bump_characters(Character.objects.filter(owner=db_player).values_list("name", flat=True))
+        if (renamed or changed) and not created:
+            Player.objects.filter(uid=uid).update(version=F("version") + 1)  # NOTE: cached pages of the player are not used anymore
+
+
+def _refresh_player(uid: int) -> None:
+    try:
+        add_player(uid)
+    finally:
+        connections.close_all()  # NOTE: connections are per thread, and this one is reused
+
+
+def _report_refresh(future: Future) -> None:
+    exception = future.exception()
+    if exception is not None and not isinstance(exception, AssertionError):
+        print(f"Background refresh failed ({exception.__class__.__name__}: {exception}).")
+
+
+def _forget_refresh(uid: str, future: Future) -> None:
+    with REFRESH_LOCK:
+        if REFRESHES.get(uid) is future:
+            del REFRESHES[uid]
+
+
+def refresh_player(uid: int) -> Future:
+    """Add (or update) a player in the background, sharing the refresh already running for this UID if any"""
+    uid = str(uid)
+    with REFRESH_LOCK:
+        if uid in REFRESHES:
+            return REFRESHES[uid]
+        future = REFRESH_EXECUTOR.submit(_refresh_player, uid)
+        REFRESHES[uid] = future
+    future.add_done_callback(_report_refresh)
+    future.add_done_callback(lambda future: _forget_refresh(uid, future))
+    return future
+
+
+def ensure_player(uid: int, deadline: float | None = None) -> str:
+    """Make sure a player can be displayed, without waiting for Enka.Network if it already was added.
+
+    Returns "fresh" if the stored data is up to date, "stale" if it is being refreshed in the background,
+    "fetched" if the player was just added and "pending" if it could not be added before the deadline.
+    """
+    if Player.objects.filter(uid=uid).exists():
+        if get_cached_response(uid) is not None:
+            CACHE_STATS["hits"] += 1
+            return "fresh"
+        refresh_player(uid)
+        return "stale"
+    reason = negative.lookup(uid)
+    assert reason is None, negative.MESSAGES[reason].format(uid=uid)
+    future = refresh_player(uid)
+    try:
+        future.result(timeout=deadline)
+    except TimeoutError:
+        return "pending"
+    return "fetched"
+
+
+def ensure_players(uids: list[str], deadline: float | None = None, limit: int | None = None) -> dict[str, tuple[str, str | None]]:
+    """Same as ensure_player for many players at once, refreshing those which need it concurrently.
+
+    At most `limit` refreshes are started, those already running for other requests being shared for free.
+    Returns, for each UID, "cached" if the stored data is up to date (or could not be refreshed), "refreshed"
+    if it was fetched from Enka.Network, "refreshing" if old data is available but the refresh is not done
+    before the deadline (or was not started), "pending" for a new player which is not added yet and "failed",
+    along with why.
+    """
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    known = set(Player.objects.filter(uid__in=uids).values_list("uid", flat=True))
+    fresh = set(EnkaResponse.objects.filter(uid__in=known, expires__gt=now).values_list("uid", flat=True))
+    states = {}
+    refreshes = {}
+    started = 0
+    for uid in uids:
+        if uid in fresh:
+            CACHE_STATS["hits"] += 1
+            states[uid] = ("cached", None)
+            continue
+        reason = negative.lookup(uid) if uid not in known else None
+        if reason is not None:
+            states[uid] = ("failed", negative.MESSAGES[reason].format(uid=uid))
+            continue
+        if uid not in REFRESHES:
+            if limit is not None and started >= limit:
+                states[uid] = ("refreshing" if uid in known else "pending", None)  # NOTE: left for a later call
+                continue
+            started += 1
+        refreshes[uid] = refresh_player(uid)  # NOTE: bounded by REFRESH_EXECUTOR, and shared with other requests
+    done, _ = wait(refreshes.values(), timeout=deadline)
+    for uid, future in refreshes.items():
+        if future not in done:
+            states[uid] = ("refreshing" if uid in known else "pending", None)
+        elif future.exception() is None:
+            states[uid] = ("refreshed", None)
+        elif uid in known:
+            states[uid] = ("cached", None)  # NOTE: the stored data is still better than nothing
+        elif isinstance(future.exception(), AssertionError):
+            states[uid] = ("failed", str(future.exception()))
         else:
-            character_icon = "https://enka.network/ui/UI_AvatarIcon_?.png"
-        try:
-            db_character = Character(
-                name=character_name,
-                icon=character_icon,
-                stat_hp=get_character_hp(character_obj["fightPropMap"]),
-                stat_atk=get_character_atk(character_obj["fightPropMap"]),
-                stat_def=get_character_def(character_obj["fightPropMap"]),
-                stat_cr=character_obj["fightPropMap"]["20"] * 100,
-                stat_cd=character_obj["fightPropMap"]["22"] * 100,
-                stat_er=character_obj["fightPropMap"]["23"] * 100,
-                stat_em=character_obj["fightPropMap"]["28"],
-                owner=db_player
-            )
+            states[uid] = ("failed", f"Enka.Network did not answer for UID '{uid}', please try again later.")
+    return {uid: states[uid] for uid in uids}
+
+
+def random_uid() -> str:
+    """Draw a random UID, from the ranges used by Enka.Network"""
+    uid = str(random.randint(1e8, 1e9 - 1))
+    return uid[0] + "0" + uid[2:]
+
+
+def probe_uid(uid: str) -> bool:
+    """Check whether a UID has a public showcase, and add the player if so"""
+    try:
+        if negative.lookup(uid) is not None:
+            return False
+        RANDOM_STATS["probes"] += 1
+        summary = interrogate_enka(uid, summary_only=True)
+        if "playerInfo" not in summary or not summary["playerInfo"].get("showAvatarInfoList"):
+            if "playerInfo" in summary:
+                negative.remember(uid, NegativeResult.HIDDEN)
+            return False
+        RANDOM_STATS["public"] += 1
+        add_player(uid)
+        RANDOM_STATS["found"] += 1
+        return True
+    except AssertionError:
+        return False
+    finally:
+        connections.close_all()
+
+
+def fill_random_pool(budget: int = RANDOM_PROBE_BUDGET) -> int:
+    """Try at most `budget` random UIDs simultaneously, until the pool of random players is full"""
+    RANDOM_STATS["fills"] += 1
+    found = 0
+    futures = {PROBE_EXECUTOR.submit(probe_uid, uid): uid for uid in [random_uid() for _ in range(budget)]}
+    for future in as_completed(futures):
+        if future.exception() is None and future.result():
+            RANDOM_POOL.append(futures[future])
+            found += 1
+        if len(RANDOM_POOL) >= RANDOM_POOL_SIZE:
+            for other in futures:
+                other.cancel()  # NOTE: only cancels the UIDs which were not tried yet
+            break
+    print(f"Random pool filled with {found} players ({len(RANDOM_POOL)} available).")
+    return found
+
+
+def _fill_random_pool() -> None:
+    try:
+        fill_random_pool()
+    finally:
+        RANDOM_LOCK.release()
+
+
+def refill_random_pool() -> None:
+    """Fill the pool of random players in the background, if it is running low"""
+    if len(RANDOM_POOL) >= RANDOM_POOL_LOW or not RANDOM_LOCK.acquire(blocking=False):
+        return  # NOTE: the pool is either full enough, or already being filled
+    threading.Thread(target=_fill_random_pool, name="random-pool", daemon=True).start()
+
+
+def random_known_player() -> str | None:
+    """Pick a known player, without sorting the whole table"""
+    uids = Player.objects.order_by("uid").values_list("uid", flat=True)
+    first, last = uids.first(), uids.last()  # NOTE: each read from one end of the primary key's index
+    if first is None:
+        return None
+    # NOTE: UIDs all have 9 digits, their order as strings is thus the numeric one
+    target = str(random.randint(int(first), int(last)))
+    return Player.objects.filter(uid__gte=target).order_by("uid").values_list("uid", flat=True).first()
+
+
+def pick_random_player() -> str | None:
+    """Pick a random player with a public showcase"""
+    refill_random_pool()
+    try:
+        return RANDOM_POOL.popleft()
+    except IndexError:
+        pass
+    # NOTE: the pool is only empty right after starting, in which case a known player does the job
+    uid = random_known_player()
+    if uid is None:
+        with RANDOM_LOCK:  # NOTE: waits for the pool being filled in the background
+            if len(RANDOM_POOL) == 0:
+                fill_random_pool()
+            uid = RANDOM_POOL.popleft() if len(RANDOM_POOL) > 0 else None
+    return uid
+
+
+# Adding players without blocking
+# -------------------------------
+
+
+# NOTE: the same steps as above, except that Enka.Network is waited for in the event loop instead of in a thread,
+# database accesses stay synchronous and are run one after the other by sync_to_async
+
+
+async def ainterrogate_enka(uid: int, summary_only: bool = False) -> dict:
+    """Get the informations from Enka.Network, without blocking the event loop"""
+    print(f"Asking Enka.Network for UID {uid}...")
+    url = f"{BASE_URL}/{uid}?info" if summary_only else f"{BASE_URL}/{uid}"
+    try:
+        response = await enka.aget(url)
+    except httpx.HTTPError as e:
+        print(f"Request failed ({e.__class__.__name__}).")
+        raise AssertionError(f"Enka.Network did not answer for UID '{uid}', please try again later.")
+    return await sync_to_async(read_enka_response)(uid, response, summary_only)
+
+
+async def await_fetch_lock(uid: int) -> None:
+    """Wait until nobody is fetching a UID anymore, letting other coroutines run meanwhile"""
+    while True:
+        expired = datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(seconds=FETCH_LOCK_LEASE)
+        if not await sync_to_async(FetchLock.objects.filter(uid=str(uid), acquired__gte=expired).exists)():
+            return
+        await asyncio.sleep(FETCH_LOCK_POLL)
+
+
+async def aadd_player(uid: int) -> None:
+    """Same as add_player, from an event loop"""
+    reason = await sync_to_async(negative.lookup)(uid)
+    assert reason is None, negative.MESSAGES[reason].format(uid=uid)
+    while True:
+        if await sync_to_async(is_up_to_date)(uid):
+            return
+        token = await sync_to_async(acquire_fetch_lock)(uid)
+        if token is not None:
+            break
+        await await_fetch_lock(uid)
+    try:
+        cached, db_player_exists = await sync_to_async(read_cached_player)(uid)
+        if cached is not None and db_player_exists:
+            return
+        if cached is not None:
+            raw_data = json.loads(await sync_to_async(lambda: cached.payload)())
+        else:
+            raw_data = await ainterrogate_enka(uid)
+        await sync_to_async(store_player)(uid, raw_data, db_player_exists)
+    finally:
+        await sync_to_async(release_fetch_lock)(uid, token)
+
+
+def _report_async_refresh(task: asyncio.Task) -> None:
+    if ASYNC_REFRESHES.get(task.get_name()) is task:
+        del ASYNC_REFRESHES[task.get_name()]
+    if not task.cancelled() and task.exception() is not None and not isinstance(task.exception(), AssertionError):
+        print(f"Background refresh failed ({task.exception().__class__.__name__}: {task.exception()}).")
+
+
+def arefresh_player(uid: int) -> asyncio.Task:
+    """Add (or update) a player in the event loop, sharing the refresh already running for this UID if any"""
+    uid = str(uid)
+    task = ASYNC_REFRESHES.get(uid)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.get_running_loop().create_task(aadd_player(uid), name=uid)
+        ASYNC_REFRESHES[uid] = task  # NOTE: also keeps the task from being garbage collected while it runs
+        task.add_done_callback(_report_async_refresh)
+    return task
+
+
+def _get_player_state(uid: int) -> tuple[bool, bool]:
+    if Player.objects.filter(uid=uid).exists():
+        return True, get_cached_response(uid) is not None
+    return False, False
+
+
+async def aensure_player(uid: int, deadline: float | None = None) -> str:
+    """Same as ensure_player, from an event loop"""
+    exists, fresh = await sync_to_async(_get_player_state)(uid)
+    if exists:
+        if fresh:
+            CACHE_STATS["hits"] += 1
+            return "fresh"
+        arefresh_player(uid)
+        return "stale"
+    reason = await sync_to_async(negative.lookup)(uid)
+    assert reason is None, negative.MESSAGES[reason].format(uid=uid)
+    try:
+        await asyncio.wait_for(asyncio.shield(arefresh_player(uid)), timeout=deadline)
+    except asyncio.TimeoutError:
+        return "pending"
+    return "fetched"
+
+
+async def aprobe_uid(uid: str) -> bool:
+    """Same as probe_uid, from an event loop"""
+    try:
+        if await sync_to_async(negative.lookup)(uid) is not None:
+            return False
+        RANDOM_STATS["probes"] += 1
+        summary = await ainterrogate_enka(uid, summary_only=True)
+        if "playerInfo" not in summary or not summary["playerInfo"].get("showAvatarInfoList"):
+            if "playerInfo" in summary:
+                await sync_to_async(negative.remember)(uid, NegativeResult.HIDDEN)
+            return False
+        RANDOM_STATS["public"] += 1
+        await aadd_player(uid)
+        RANDOM_STATS["found"] += 1
+        return True
+    except AssertionError:
+        return False
+
+
+async def afill_random_pool(budget: int = RANDOM_PROBE_BUDGET) -> int:
+    """Same as fill_random_pool, trying every UID at once since probes only wait for the network"""
+    RANDOM_STATS["fills"] += 1
+    found = 0
+    tasks = {asyncio.ensure_future(aprobe_uid(uid)): uid for uid in [random_uid() for _ in range(budget)]}
+    try:
+        for completed in asyncio.as_completed(tasks):
+            try:
+                public = await completed
+            except Exception:
+                public = False  # NOTE: like future.exception() in fill_random_pool, one failed probe does not stop the others
+            if public:
+                found += 1
+            if len(RANDOM_POOL) + found >= RANDOM_POOL_SIZE:
+                break
+    finally:
+        for task, uid in tasks.items():
+            if not task.done():
+                task.cancel()  # NOTE: the pool is full, or the fill itself was cancelled
+            elif not task.cancelled() and task.exception() is None and task.result():
+                RANDOM_POOL.append(uid)
+    print(f"Random pool filled with {found} players ({len(RANDOM_POOL)} available).")
+    return found
+
+
+async def apick_random_player() -> str | None:
+    """Same as pick_random_player, from an event loop"""
+    if len(RANDOM_POOL) < RANDOM_POOL_LOW and RANDOM_LOCK.acquire(blocking=False):
+        task = asyncio.get_running_loop().create_task(afill_random_pool())
+        task.add_done_callback(lambda task: RANDOM_LOCK.release())
+        ASYNC_TASKS.add(task)  # NOTE: keeps the task from being garbage collected while it runs
+        task.add_done_callback(ASYNC_TASKS.discard)
+    try:
+        return RANDOM_POOL.popleft()
+    except IndexError:
+        pass
+    uid = await sync_to_async(random_known_player)()
+    if uid is None:
+        await afill_random_pool()
+        uid = RANDOM_POOL.popleft() if len(RANDOM_POOL) > 0 else None
+    return uid
+
+
+def write_characters(db_player: Player, characters: list[dict]) -> bool:
+    """Write the characters of a player, only touching the rows that changed, and tell whether any did"""
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    names = [character["fields"]["name"] for character in characters]
+    existing_characters = {}
+    characters_to_drop = []
+    for db_character in Character.objects.filter(owner=db_player, name__in=names).order_by("id"):
+        if db_character.name in existing_characters or db_character.name == "???":
+            characters_to_drop.append(db_character)  # NOTE: duplicates and unknown characters are always replaced
+        else:
+            existing_characters[db_character.name] = db_character
+    existing_artifacts = {}
+    for db_artifact in Artifact.objects.filter(owner__in=existing_characters.values()).order_by("id"):
+        existing_artifacts.setdefault(db_artifact.owner_id, {}).setdefault(db_artifact.equiptype, []).append(db_artifact)
+    characters_to_insert = []
+    characters_to_update = []
+    artifacts_to_insert = []
+    artifacts_to_update = []
+    artifacts_to_drop = []
+    stats_to_insert = []
+    stats_to_drop = []
+    artifacts_rated = []  # NOTE: (artifact, its parsed stats) of the artifacts written, rated before being written
+    characters_artifacts_kept = {}  # NOTE: id() of a character (which may not be saved yet) -> artifacts it wears once written, by type
+    characters_touched = []  # NOTE: characters whose progress has to be computed again
+    characters_outdated = []  # NOTE: characters rated by another version, whose stored rows have to be rated again
+    for character in characters:
+        db_character = existing_characters.pop(character["fields"]["name"], None)
+        touched = True
+        if db_character is None:
+            db_character = Character(owner=db_player, fingerprint=character["fingerprint"], **character["fields"])
             characters_to_insert.append(db_character)
-        except KeyError:  # Should only happen after a new character is released
-            print(f"Character {character_obj['avatarId']} not found in constants/characters.json. Skipping.")
-            continue
-        artifacts: list = character_obj["equipList"]
-        # Delete old artifacts
-        # artifacts_to_drop += Artifact.objects.filter(owner=db_character)
-        for artifact_index in range(len(artifacts)):  # NOTE: usually 5
-            artifact_obj = artifacts[artifact_index]["flat"]
-            if "equipType" not in artifact_obj:
-                continue  # NOTE: weapons are stored as artifacts 
-            db_artifact = Artifact(
-                equiptype=EQUIPTYPE[artifact_obj["equipType"]],
-                level=artifact_obj["rankLevel"] * 4,
-                owner=db_character
-            )
-            artifacts_to_insert.append(db_artifact)
-            substats_to_insert.append(
-                Substat(
-                    name=APPENDPROP[artifact_obj["reliquaryMainstat"]["mainPropId"]],
-                    value=artifact_obj["reliquaryMainstat"]["statValue"],
-                    ismainstat=True,
-                    owner=db_artifact
-                )
-            )
-            rolls = []
-            if "appendPropIdList" not in artifacts[artifact_index]['reliquary']:
-                continue # NOTE: This happens when a low quality artifact has no substats.
-            for roll_id in artifacts[artifact_index]['reliquary']['appendPropIdList']:
-                prop_type = [roll for roll in RELIQUARYAFFIXEXCELCONFIGDATA if roll['id'] == roll_id][0]['propType']
-                prop_name = APPENDPROP[prop_type]
-                rolls.append(prop_name)
-            for artifact_substat_index in range(len(artifact_obj["reliquarySubstats"])):  # NOTE: usually 4
-                substat_name = APPENDPROP[artifact_obj["reliquarySubstats"][artifact_substat_index]["appendPropId"]]
-                substats_to_insert.append(
-                    Substat(
-                        name=substat_name,
-                        value=artifact_obj["reliquarySubstats"][artifact_substat_index]["statValue"],
-                        rolls=len([roll for roll in rolls if roll == substat_name]),
-                        owner=db_artifact
-                    )
-                )
-    
-    # Remove characters with name "???"
-    # names += ["???"]
-    # characters_to_insert = [c for c in characters_to_insert if c.name != "???"]
-
-    # Artifact.objects.filter(owner__in=characters_to_insert).delete()
-    Character.objects.filter(owner=db_player, name__in=names+["???"]).delete()
+        elif db_character.fingerprint != character["fingerprint"]:
+            for field, value in character["fields"].items():
+                setattr(db_character, field, value)
+            db_character.fingerprint = character["fingerprint"]
+            db_character.updated = now
+            characters_to_update.append(db_character)
+        else:
+            touched = False
+        characters_artifacts = existing_artifacts.get(db_character.id, {}) if db_character.id is not None else {}
+        kept = characters_artifacts_kept.setdefault(id(db_character), {})
+        outdated = db_character.id is not None and (db_character.scoring_version != scoring.SCORING_VERSION or db_character.texts_version != scoring.TEXTS_VERSION)
+        changes = len(artifacts_to_insert) + len(artifacts_to_update) + len(artifacts_to_drop)
+        for artifact in character["artifacts"]:
+            candidates = characters_artifacts.pop(artifact["equiptype"], [])
+            db_artifact = candidates[0] if len(candidates) > 0 else None
+            artifacts_to_drop += [candidate.id for candidate in candidates[1:]]
+            if db_artifact is not None and db_artifact.fingerprint == artifact["fingerprint"]:
+                kept.setdefault(artifact["equiptype"], db_artifact)
+                outdated = outdated or db_artifact.scoring_version != scoring.SCORING_VERSION
+                continue
+            if db_artifact is None:
+                db_artifact = Artifact(owner=db_character)
+                artifacts_to_insert.append(db_artifact)
+            else:
+                stats_to_drop.append(db_artifact.id)
+                db_artifact.updated = now
+                artifacts_to_update.append(db_artifact)
+            db_artifact.equiptype = artifact["equiptype"]
+            db_artifact.level = artifact["level"]
+            db_artifact.fingerprint = artifact["fingerprint"]
+            kept.setdefault(artifact["equiptype"], db_artifact)
+            artifacts_rated.append((db_artifact, artifact["stats"]))
+            stats_to_insert += [Substat(owner=db_artifact, **stat) for stat in artifact["stats"]]
+        for candidates in characters_artifacts.values():  # NOTE: artifacts which are not worn anymore
+            artifacts_to_drop += [candidate.id for candidate in candidates]
+        if outdated:
+            characters_outdated.append(db_character)
+        elif touched or changes != len(artifacts_to_insert) + len(artifacts_to_update) + len(artifacts_to_drop):
+            characters_touched.append(db_character)
+    # NOTE: rated in memory, so that rows are written once, and those which did not change are not written at all
+    rate_parsed(artifacts_rated, stats_to_insert)
+    for db_character in characters_touched:
+        db_character.progress = rate_character([db_artifact.rating["value"] for db_artifact in characters_artifacts_kept[id(db_character)].values()])
+        db_character.scoring_version = scoring.SCORING_VERSION
+        db_character.texts_version = scoring.TEXTS_VERSION
+    written = {id(db_character) for db_character in characters_to_insert + characters_to_update}
+    characters_rated = [db_character for db_character in characters_touched if id(db_character) not in written]
+    Character.objects.filter(id__in=[db_character.id for db_character in characters_to_drop]).delete()
+    Artifact.objects.filter(id__in=artifacts_to_drop).delete()
+    Substat.objects.filter(owner_id__in=stats_to_drop).delete()
+    ensure_definitions([db_character.definition_id for db_character in characters_to_insert + characters_to_update])
     Character.objects.bulk_create(characters_to_insert)
+    Character.objects.bulk_update(characters_to_update, ["definition", "stat_hp", "stat_atk", "stat_def", "stat_cr", "stat_cd", "stat_er", "stat_em", "fingerprint", "updated", "progress", "scoring_version", "texts_version"])
+    update_grouped(Character, characters_rated, ["progress"], scoring_version=scoring.SCORING_VERSION, texts_version=scoring.TEXTS_VERSION, updated=now)
     Artifact.objects.bulk_create(artifacts_to_insert)
-    Substat.objects.bulk_create(substats_to_insert)
+    Artifact.objects.bulk_update(artifacts_to_update, ["equiptype", "level", "fingerprint", "updated", "rating", "scoring_version"])
+    Substat.objects.bulk_create(stats_to_insert)
+    Character.objects.filter(id__in=[db_character.id for db_character in characters_to_insert + characters_to_update]).update(cv=F("stat_cd") + 2 * F("stat_cr"))
+    materialize_characters([db_character.id for db_character in characters_outdated])
+    touch_quartiles([db_character.name for db_character in characters_to_insert + characters_to_update])
+    bump_characters([db_character.name for db_character in characters_to_insert + characters_to_update + characters_to_drop])
+    print(
+        f"Player {db_player.uid}: "
+        f"{len(characters_to_insert)} characters inserted, {len(characters_to_update)} updated, "
+        f"{len(artifacts_to_insert)} artifacts inserted, {len(artifacts_to_update)} updated, {len(artifacts_to_drop)} removed."
+    )
+    return len(characters_to_drop + characters_to_insert + characters_to_update + artifacts_to_insert + artifacts_to_update + artifacts_to_drop) > 0
+
+
+def describe_stat(name: str, value) -> tuple[str, str]:
+    """Write a stat the way it is shown, along with its style"""
+    is_percent = "%" in name or "Crit" in name or "Bonus" in name
+    text_name = (
+        name
+        .replace('Flat ', '')
+        .replace('%', '')
+        .replace('Energy Recharge', 'ER')
+        .replace('Elemental Mastery', 'EM')
+        .replace('Crit DMG', 'CD')
+        .replace('Crit RATE', 'CR')
+        .replace(' DMG Bonus', '')
+    )
+    textstyle = ''
+    if name in GOOD_SUBSTATS:
+        textstyle = 'font-bold'
+    elif name in AVERAGE_SUBSTATS:
+        textstyle = ''
+    elif name in BAD_SUBSTATS:
+        textstyle = 'italic text-opacity-30 text-black'
+    text = f"{text_name}+{value:.{0 if 'Flat' in name else 1}f}{'%' if is_percent else ''}"
+    return text, textstyle
+
+
+def rate_rows(characters: list[Character], artifacts: list[Artifact], stats: list[Substat]) -> None:
+    """Compute the ratings of artifacts, the progress of characters and the texts of stats, without storing them"""
+    positions = {artifact.id: i for i, artifact in enumerate(artifacts)}
+    ratings = scoring.rate_artifacts(
+        [artifact.equiptype for artifact in artifacts],
+        [positions[stat.owner_id] for stat in stats],
+        [stat.name for stat in stats],
+        [stat.value for stat in stats],
+        [stat.rolls for stat in stats],
+    )
+    scores = {}
+    shown = set()  # NOTE: only the first artifact of each type is shown, and counts for the progress
+    for artifact, rating in sorted(zip(artifacts, ratings), key=lambda pair: pair[0].id):
+        artifact.rating = rating
+        artifact.scoring_version = scoring.SCORING_VERSION
+        if (artifact.owner_id, artifact.equiptype) not in shown:
+            shown.add((artifact.owner_id, artifact.equiptype))
+            scores.setdefault(artifact.owner_id, []).append(rating["value"])
+    for stat in stats:
+        stat.text, stat.textstyle = describe_stat(stat.name, stat.value)
+    for character in characters:
+        character.progress = rate_character(scores.get(character.id, []))
+        character.scoring_version = scoring.SCORING_VERSION
+        character.texts_version = scoring.TEXTS_VERSION
+
+
+def rate_parsed(artifacts: list[tuple[Artifact, list[dict]]], stats: list[Substat]) -> None:
+    """Compute the ratings of artifacts about to be written, from their parsed stats, and the texts of their stats"""
+    positions = [i for i, (_, artifact_stats) in enumerate(artifacts) for _ in artifact_stats]
+    flat = [stat for _, artifact_stats in artifacts for stat in artifact_stats]
+    ratings = scoring.rate_artifacts(
+        [db_artifact.equiptype for db_artifact, _ in artifacts],
+        positions,
+        [stat["name"] for stat in flat],
+        [stat["value"] for stat in flat],
+        [stat["rolls"] for stat in flat],
+    )
+    for (db_artifact, _), rating in zip(artifacts, ratings):
+        db_artifact.rating = rating
+        db_artifact.scoring_version = scoring.SCORING_VERSION
+    for stat in stats:
+        stat.text, stat.textstyle = describe_stat(stat.name, stat.value)
+
+
+def update_grouped(model, objects: list, fields: list[str], **values) -> None:
+    """Write some fields of many rows with one UPDATE per distinct value, along with fixed values"""
+    # NOTE: ratings, progress and texts take few distinct values, bulk_update would instead build a CASE per row
+    groups = {}
+    for obj in objects:
+        key = json.dumps([getattr(obj, field) for field in fields], sort_keys=True, default=str)
+        groups.setdefault(key, (obj, []))[1].append(obj.pk)
+    for obj, ids in groups.values():
+        for start in range(0, len(ids), UPDATE_BATCH):
+            model.objects.filter(pk__in=ids[start:start + UPDATE_BATCH]).update(**{field: getattr(obj, field) for field in fields}, **values)
+
+
+def materialize(characters: list[Character], artifacts: list[Artifact], stats: list[Substat]) -> None:
+    """Compute and store the ratings of artifacts, the progress of characters and, if they are outdated, the texts of stats"""
+    outdated = {character.id for character in characters if character.texts_version != scoring.TEXTS_VERSION}
+    rate_rows(characters, artifacts, stats)
+    now = datetime.datetime.now(tz=datetime.timezone.utc)  # NOTE: update() skips auto_now, incremental exports need it
+    with transaction.atomic():
+        update_grouped(Character, characters, ["progress"], scoring_version=scoring.SCORING_VERSION, texts_version=scoring.TEXTS_VERSION, updated=now)
+        update_grouped(Artifact, artifacts, ["rating"], scoring_version=scoring.SCORING_VERSION, updated=now)
+        if len(outdated) > 0:  # NOTE: texts do not depend on the scoring, a rescore usually leaves them alone
+            artifacts_outdated = {artifact.id for artifact in artifacts if artifact.owner_id in outdated}
+            update_grouped(Substat, [stat for stat in stats if stat.owner_id in artifacts_outdated], ["text", "textstyle"])
+
+
+def materialize_characters(ids: list[int]) -> int:
+    """Compute and store the ratings of some characters, once their artifacts are written, and tell how many artifacts were rated"""
+    if len(ids) == 0:
+        return 0
+    artifacts = list(Artifact.objects.filter(owner_id__in=ids))
+    materialize(
+        list(Character.objects.filter(id__in=ids)),
+        artifacts,
+        list(Substat.objects.filter(owner__owner_id__in=ids)),
+    )
+    return len(artifacts)
+
+
+def _rescore_characters(ids: list[int]) -> None:
+    try:
+        materialize_characters(ids)
+    finally:
+        with REFRESH_LOCK:
+            RESCORES.difference_update(ids)
+        connections.close_all()  # NOTE: connections are per thread, and this one is reused
+
+
+def rescore_characters(ids: list[int]) -> None:
+    """Store in the background the ratings of characters scored by another version, unless it is already being done"""
+    with REFRESH_LOCK:
+        ids = [id for id in ids if id not in RESCORES]
+        RESCORES.update(ids)
+    if len(ids) > 0:
+        REFRESH_EXECUTOR.submit(_rescore_characters, ids).add_done_callback(_report_refresh)
+
+
+def update_quartiles(name: str) -> dict:
+    """Compute and store the quartiles of every stat among the owners of a character"""
+    rows = list(Character.objects.filter(name=name).values_list(*CHARACTER_STATS))
+    thresholds = {stat: quartiles([row[i] for row in rows]) if rows else (0.0, 0.0) for i, stat in enumerate(CHARACTER_STATS)}
+    if StatQuartiles.objects.filter(name=name).update(thresholds=thresholds, count=len(rows), pending=0) == 0:
+        StatQuartiles.objects.get_or_create(name=name, defaults={"thresholds": thresholds, "count": len(rows)})
+    return thresholds
+
+
+def touch_quartiles(names: list[str]) -> None:
+    """Note that some characters changed, computing again the quartiles of those which changed enough"""
+    changes = collections.Counter(names)
+    stored = {row.name: row for row in StatQuartiles.objects.filter(name__in=changes)}
+    for name, count in changes.items():
+        row = stored.get(name)
+        # NOTE: quartiles of popular characters barely move with a single player, they are only updated once in a while
+        if row is not None and row.pending + count < row.count * QUARTILES_TOLERANCE:
+            StatQuartiles.objects.filter(name=name).update(pending=F("pending") + count)
+        else:
+            update_quartiles(name)
+
+
+def bump_characters(names: list[str]) -> None:
+    """Note that the owners of some characters changed, so that pages showing them are not reused"""
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    for name in sorted(set(names)):
+        if CharacterVersion.objects.filter(name=name).update(version=F("version") + 1, updated=now) == 0:
+            CharacterVersion.objects.get_or_create(name=name, defaults={"updated": now})
+
+
+def get_character_version(name: str) -> tuple[int, datetime.datetime] | None:
+    """Get how many times the owners of a character changed, and when they last did"""
+    return CharacterVersion.objects.filter(name=name).values_list("version", "updated").first()
+
+
+def get_player_summary(uid: int) -> dict | None:
+    """Get what is shown about a player besides its characters, along with its version, in a single query"""
+    return Player.objects.filter(uid=uid).values("uid", "nickname", "avatar", "updated", "version").first()
+
+
+def get_cached_player(uid: int, version: int) -> dict:
+    """Same as get_player, reusing what was computed for this version of the player"""
+    key = f"player:{uid}:{version}:{scoring.SCORING_VERSION}"  # NOTE: entries of older versions are never read again
+    obj = cache.get(key)
+    if obj is None:
+        obj = get_player(uid)
+        cache.set(key, obj)
+    return obj
+
+
+def get_quartiles(name: str) -> dict:
+    """Get the quartiles of every stat among the owners of a character"""
+    thresholds = StatQuartiles.objects.filter(name=name).values_list("thresholds", flat=True).first()
+    if thresholds is None:
+        thresholds = update_quartiles(name)  # NOTE: characters stored before quartiles were
+    return thresholds
 
 
 def get_substat_value(substat_name: str, artifact_substats: list) -> int:
@@ -446,6 +1209,89 @@ def rate_character(scores: list) -> dict:
     return progress
 
 
+def url_exists(url: str) -> bool:
+    """Check whether an URL can be retrieved"""
+    try:
+        return enka.get(url).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def icon_candidates(avatar_id: str) -> list[str]:
+    """List the URLs which may be the icon of a character, the most likely first"""
+    if avatar_id == "10000052":
+        return [PFPS["3900"]]
+    if avatar_id not in CHARACTERS:
+        return [Character.UNKNOWN_ICON]
+    avatar_name = CHARACTERS[avatar_id]["name"].split(" ")
+    candidates = [
+        CHARACTERS[avatar_id]["icon"],
+        f"https://enka.network/ui/UI_AvatarIcon_{avatar_name[0]}.png",
+        f"https://enka.network/ui/UI_AvatarIcon_{avatar_name[-1]}.png",
+        f"https://enka.network/ui/UI_AvatarIcon_{''.join(avatar_name).capitalize()}.png",
+    ]
+    return list(dict.fromkeys(candidates))
+
+
+def get_character_icon(avatar_id: str) -> str:
+    """Get the icon of a character, as resolved by the precompute_icons command"""
+    global ICONS, ICONS_LOADED
+    if time.monotonic() - ICONS_LOADED > ICONS_RELOAD:
+        ICONS = dict(AvatarIcon.objects.values_list("avatar_id", "url"))
+        ICONS_LOADED = time.monotonic()
+    if avatar_id in ICONS:
+        return ICONS[avatar_id]
+    return icon_candidates(avatar_id)[0]  # NOTE: never probed here, the command takes care of it
+
+
+def slugify_name(name: str) -> str:
+    """Write the name of a character the way it appears in URLs"""
+    return name.lower().replace(" ", "_")
+
+
+def define_character(avatar_id: str) -> CharacterDefinition:
+    """Describe a character of the game data, as stored in the catalog"""
+    name = CHARACTERS[avatar_id]["name"]
+    return CharacterDefinition(
+        avatar_id=avatar_id,
+        slug=slugify_name(name),
+        name=name,
+        icon=get_character_icon(avatar_id),
+    )
+
+
+def ensure_definitions(avatar_ids: list[str | None]) -> None:
+    """Add to the catalog the characters which are not in it yet, before players referencing them are written"""
+    missing = set(avatar_ids) - DEFINED - {None}
+    if len(missing) == 0:
+        return
+    defined = set(CharacterDefinition.objects.filter(avatar_id__in=missing).values_list("avatar_id", flat=True))
+    if len(missing - defined) > 0:
+        CharacterDefinition.objects.bulk_create([define_character(avatar_id) for avatar_id in sorted(missing - defined)], ignore_conflicts=True)
+    # NOTE: only remembered once committed, a rolled back ingestion would otherwise leave ids that the catalog lacks
+    transaction.on_commit(lambda: DEFINED.update(missing))
+
+
+def sync_catalog() -> int:
+    """Write again the whole catalog of characters from the game data and the resolved icons, and tell how many there are"""
+    definitions = [define_character(avatar_id) for avatar_id in CHARACTERS]
+    previous = {avatar_id: (slug, name, icon) for avatar_id, slug, name, icon in CharacterDefinition.objects.values_list("avatar_id", "slug", "name", "icon")}
+    changed = [definition.avatar_id for definition in definitions if previous.get(definition.avatar_id, (definition.slug, definition.name, definition.icon)) != (definition.slug, definition.name, definition.icon)]
+    with transaction.atomic():
+        CharacterDefinition.objects.bulk_create(
+            definitions,
+            update_conflicts=True,
+            unique_fields=["avatar_id"],
+            update_fields=["slug", "name", "icon"],
+        )
+        if len(changed) > 0:  # NOTE: cached pages and fragments showing these characters are not used anymore
+            characters = Character.objects.filter(definition_id__in=changed)
+            Player.objects.filter(uid__in=characters.values("owner_id")).update(version=F("version") + 1)
+            bump_characters(list(characters.values_list("name", flat=True).distinct()))
+    transaction.on_commit(lambda: DEFINED.update(definition.avatar_id for definition in definitions))
+    return len(definitions)
+
+
 def get_avatar(raw_data: dict) -> str:
     """Get the avatar of a player from Enka.Network's API"""
     avatar = None
@@ -454,127 +1300,155 @@ def get_avatar(raw_data: dict) -> str:
     if "profilePicture" not in raw_data["playerInfo"]:
         avatar = None
     if "id" in raw_data["playerInfo"]["profilePicture"]:
-        avatar_id = str(raw_data["playerInfo"]["profilePicture"]["id"])
-        avatar_name = PFPS[avatar_id]["iconPath"]
-        avatar_name = avatar_name.replace("_Circle", "")
-        avatar = f"https://enka.network/ui/{avatar_name}.png"
+        avatar = PFPS[str(raw_data["playerInfo"]["profilePicture"]["id"])]
     elif "avatarId" in raw_data["playerInfo"]["profilePicture"]:
-        # TODO: Currently not working.
         avatar_id = str(raw_data["playerInfo"]["profilePicture"]["avatarId"])
-        if avatar_id == "10000052":
-            avatar_id = "3900"
-            avatar_name = PFPS[avatar_id]["iconPath"]
-            avatar_name = avatar_name.replace("_Circle", "")
-            avatar = f"https://enka.network/ui/{avatar_name}.png"
-        else:
-            avatar_name = LOC[LANG][str(CHARACTERS[avatar_id]["NameTextMapHash"])].split(" ")
-            avatar = f"https://enka.network/ui/UI_AvatarIcon_{avatar_name[0]}.png"
-            request = requests.get(avatar)
-            if request.status_code != 200:
-                avatar = f"https://enka.network/ui/UI_AvatarIcon_{avatar_name[-1]}.png"
-                request = requests.get(avatar)
-                if request.status_code != 200:
-                    avatar = f"https://enka.network/ui/UI_AvatarIcon_{''.join(avatar_name).capitalize()}.png"
+        avatar = get_character_icon(avatar_id)
     else:
         avatar = None
     return avatar
 
+def get_players(uids: list[int], include_rating: bool = False) -> dict[str, dict]:
+    """Load some players, with one query per table however many they are"""
+    players = list(Player.objects.filter(uid__in=[str(uid) for uid in uids]))
+    # NOTE: one query per table, then grouped in a single pass over each of them
+    characters = list(Character.objects.filter(owner__in=players).select_related("definition").order_by("id"))
+    artifacts = list(Artifact.objects.filter(owner__owner__in=players).order_by("id"))
+    stats = list(Substat.objects.filter(owner__owner__owner__in=players).order_by("id"))
+    stale = {character.id for character in characters if character.scoring_version != scoring.SCORING_VERSION or character.texts_version != scoring.TEXTS_VERSION}
+    stale |= {artifact.owner_id for artifact in artifacts if artifact.scoring_version != scoring.SCORING_VERSION}
+    if len(stale) > 0:
+        # NOTE: stored before the scoring changed, rated again in memory only, a page view never writes
+        rate_rows(characters, artifacts, stats)
+        rescore_characters(sorted(stale))
+    players_characters = {}  # NOTE: player uid -> characters
+    for character in characters:
+        players_characters.setdefault(character.owner_id, []).append(character)
+    characters_artifacts = {}  # NOTE: character id -> type -> first artifact of this type
+    for artifact in artifacts:
+        characters_artifacts.setdefault(artifact.owner_id, {}).setdefault(artifact.equiptype, artifact)
+    artifacts_stats = {}  # NOTE: artifact id -> stats, main stat included
+    for stat in stats:
+        artifacts_stats.setdefault(stat.owner_id, []).append(stat)
+    return {
+        player.uid: build_player(player, players_characters.get(player.uid, []), characters_artifacts, artifacts_stats)
+        for player in players
+    }
+
+
 def get_player(uid: int, include_rating: bool = False) -> dict:
+    players = get_players([uid], include_rating=include_rating)
+    if str(uid) not in players:
+        raise Player.DoesNotExist(f"No player has the UID '{uid}'.")
+    return players[str(uid)]
+
+
+def compare_players(player1: dict, player2: dict) -> dict:
+    """Pair the characters of two players, telling who wins each of them"""
+    characters1 = {character["name"]: character for character in player1["characters"]}
+    characters2 = {character["name"]: character for character in player2["characters"]}
+    rows = []
+    wins = [0, 0]
+    for name in dict.fromkeys(list(characters1) + list(characters2)):
+        character1, character2 = characters1.get(name), characters2.get(name)
+        winner = 0  # NOTE: nobody wins a character only one of them has
+        if character1 is not None and character2 is not None:
+            value1, value2 = character1["progress"]["truevalue"], character2["progress"]["truevalue"]
+            winner = 1 if value1 > value2 else 2 if value2 > value1 else 0
+            if winner != 0:
+                wins[winner - 1] += 1
+        rows.append({
+            "name": name,
+            "icon": (character1 or character2)["icon"],
+            "character1": character1,
+            "character2": character2,
+            "winner": winner,
+        })
+    # Shared characters first, the best ones on top
+    rows.sort(key=lambda row: (
+        row["character1"] is None or row["character2"] is None,
+        -max(character["progress"]["truevalue"] for character in [row["character1"], row["character2"]] if character is not None),
+    ))
+    return {
+        "player1": {key: player1[key] for key in ["nickname", "uid", "avatar", "updated"]},
+        "player2": {key: player2[key] for key in ["nickname", "uid", "avatar", "updated"]},
+        "characters": rows,
+        "wins": wins,
+        "winner": 1 if wins[0] > wins[1] else 2 if wins[1] > wins[0] else 0,
+    }
+
+
+def get_duel(uid1: str, uid2: str) -> dict:
+    """Compare two players, computing it again only when one of them changed"""
+    versions = dict(Player.objects.filter(uid__in=[uid1, uid2]).values_list("uid", "updated"))
+    assert uid1 in versions, f"No player seems to have the UID '{uid1}'."
+    assert uid2 in versions, f"No player seems to have the UID '{uid2}'."
+    key = f"duel:{uid1}:{uid2}:" + fingerprint(versions[uid1], versions[uid2], scoring.SCORING_VERSION)
+    duel = cache.get(key)
+    if duel is None:
+        players = get_players([uid1, uid2])  # NOTE: both at once, one query per table
+        duel = compare_players(players[uid1], players[uid2])
+        cache.set(key, duel, DUEL_TTL)
+    return duel
+
+
+def build_player(player: Player, characters: list[Character], characters_artifacts: dict, artifacts_stats: dict) -> dict:
     obj = {}
-    player = Player.objects.get(uid=uid)
     obj["nickname"] = player.nickname
     obj["uid"] = player.uid
     obj["avatar"] = player.avatar
     obj["updated"] = player.updated
     obj["characters"] = []
-    characters = Character.objects.filter(owner=player).select_related("owner")
-    artifacts = Artifact.objects.filter(owner__in=characters).select_related("owner")
-    stats = Substat.objects.filter(owner__in=artifacts).select_related("owner")
-    values_hp = [character.stat_hp for character in characters]
-    values_atk = [character.stat_atk for character in characters]
-    values_def = [character.stat_def for character in characters]
-    values_cr = [character.stat_cr for character in characters]
-    values_cd = [character.stat_cd for character in characters]
-    values_er = [character.stat_er for character in characters]
-    values_em = [character.stat_em for character in characters]
+    thresholds = {stat: quartiles([getattr(character, stat) for character in characters]) for stat in CHARACTER_STATS} if characters else {}
 
     for character in characters:
-        scores = []
         obj["characters"].append({
             "name": character.name,
             "icon": character.icon,
-            "stat_hp": {"value": character.stat_hp, "style": get_style(character.stat_hp, values_hp)},
-            "stat_atk": {"value": character.stat_atk, "style": get_style(character.stat_atk, values_atk)},
-            "stat_def": {"value": character.stat_def, "style": get_style(character.stat_def, values_def)},
-            "stat_cr": {"value": character.stat_cr, "style": get_style(character.stat_cr, values_cr)},
-            "stat_cd": {"value": character.stat_cd, "style": get_style(character.stat_cd, values_cd)},
-            "stat_er": {"value": character.stat_er, "style": get_style(character.stat_er, values_er)},
-            "stat_em": {"value": character.stat_em, "style": get_style(character.stat_em, values_em)},
+            "stat_hp": {"value": character.stat_hp, "style": get_style(character.stat_hp, thresholds["stat_hp"])},
+            "stat_atk": {"value": character.stat_atk, "style": get_style(character.stat_atk, thresholds["stat_atk"])},
+            "stat_def": {"value": character.stat_def, "style": get_style(character.stat_def, thresholds["stat_def"])},
+            "stat_cr": {"value": character.stat_cr, "style": get_style(character.stat_cr, thresholds["stat_cr"])},
+            "stat_cd": {"value": character.stat_cd, "style": get_style(character.stat_cd, thresholds["stat_cd"])},
+            "stat_er": {"value": character.stat_er, "style": get_style(character.stat_er, thresholds["stat_er"])},
+            "stat_em": {"value": character.stat_em, "style": get_style(character.stat_em, thresholds["stat_em"])},
             "artifacts": {},
         })
-        characters_artifacts = [a for a in artifacts if a.owner == character]
-        characters_substats = [s for s in stats if s.owner in characters_artifacts]
-        # print("CHARACTER'S SUBSTATS", characters_substats)
         for equiptype in EQUIPTYPE.values():
-            artifacts_ = [a for a in characters_artifacts if a.equiptype == equiptype]
-            if len(artifacts_) == 0:
+            artifact = characters_artifacts.get(character.id, {}).get(equiptype)
+            if artifact is None:
                 obj["characters"][-1]["artifacts"][equiptype] = {
                     "mainstat": {},
                     "substats": [],
                 }
                 continue
-            artifact = artifacts_[0]
-            # print("ARTIFACT", artifact)
-            artifacts_stats = [s for s in characters_substats if s.owner == artifact]
-            # print("ARTIFACT'S SUBSTATS", artifacts_stats)
             equiptype = artifact.equiptype.lower()
             obj["characters"][-1]["artifacts"][equiptype] = {
                 "mainstat": {},
                 "substats": [],
             }
-            mainstat = [stat for stat in artifacts_stats if stat.ismainstat][0]
-            substats = [stat for stat in artifacts_stats if not stat.ismainstat]
-            rating = rate_artifact(artifact=artifact, mainstat=mainstat, substats=substats)
-            obj["characters"][-1]["artifacts"][equiptype]["rating"] = rating
-            scores.append(rating["value"])
+            mainstat = [stat for stat in artifacts_stats.get(artifact.id, []) if stat.ismainstat][0]
+            substats = [stat for stat in artifacts_stats.get(artifact.id, []) if not stat.ismainstat]
+            obj["characters"][-1]["artifacts"][equiptype]["rating"] = artifact.rating
             # obj["characters"][-1]["artifacts"][equiptype]["mainstat"] = {
             #     "name": mainstat.name,
             #     "value": mainstat.value,
             # }
             for i, stat in enumerate([mainstat] + substats):
-                is_percent = "%" in stat.name or "Crit" in stat.name or "Bonus" in stat.name
-                text_name = (
-                    stat.name
-                    .replace('Flat ', '')
-                    .replace('%', '')
-                    .replace('Energy Recharge', 'ER')
-                    .replace('Elemental Mastery', 'EM')
-                    .replace('Crit DMG', 'CD')
-                    .replace('Crit RATE', 'CR')
-                    .replace(' DMG Bonus', '')
-                )
-                textstyle = ''
-                if stat.name in GOOD_SUBSTATS:
-                    textstyle = 'font-bold'
-                elif stat.name in AVERAGE_SUBSTATS:
-                    textstyle = ''
-                elif stat.name in BAD_SUBSTATS:
-                    textstyle = 'italic text-opacity-30 text-black'
-                text = f"{text_name}+{stat.value:.{0 if 'Flat' in stat.name else 1}f}{'%' if is_percent else ''}"
                 if i == 0: # Main stat
                     obj["characters"][-1]["artifacts"][equiptype]["mainstat"] = {
                         "name": stat.name,
                         "value": stat.value,
-                        "text": text,
-                        "textstyle": textstyle,
+                        "text": stat.text,
+                        "textstyle": stat.textstyle,
                     }
                 else:
                     obj["characters"][-1]["artifacts"][equiptype]["substats"].append({
                         "name": stat.name,
                         "value": stat.value,
                         "rolls": stat.rolls,
-                        "text": text,
-                        "textstyle": textstyle,
+                        "text": stat.text,
+                        "textstyle": stat.textstyle,
                     })
             for _ in range(4 - len(substats)):
                 obj["characters"][-1]["artifacts"][equiptype]["substats"].append({
@@ -584,29 +1458,87 @@ def get_player(uid: int, include_rating: bool = False) -> dict:
                     "text": "-",
                     "textstyle": 'italic text-opacity-0 text-black',
                 })
-        obj["characters"][-1]["progress"] = rate_character(scores)
+        obj["characters"][-1]["progress"] = character.progress
     # obj["characters"].sort(key=lambda x: x["name"])
     obj["characters"].sort(key=lambda x: x["progress"]["truevalue"], reverse=True)
     return obj
 
 
-def get_characters(name: str) -> list:
+def get_character_name(name: str) -> str | None:
+    """Find how a character is named in the database, from its name in an URL"""
+    # NOTE: an exact match on the indexed slug of the catalog, rather than a case-insensitive scan of the characters
+    known = CharacterDefinition.objects.filter(slug=slugify_name(name.replace("_", " "))).values_list("name", flat=True).first()
+    return known if known is not None and Character.objects.filter(name=known).exists() else None
+
+
+def parse_cursor(after: str) -> tuple[decimal.Decimal, int]:
+    try:
+        cv, id = after.split("_")
+        cv, id = decimal.Decimal(cv), int(id)
+    except (ValueError, decimal.InvalidOperation):
+        raise AssertionError(f"'{after}' is not a valid page.")
+    if not cv.is_finite():  # NOTE: "nan" and "inf" are parsed, but cannot be compared by the database
+        raise AssertionError(f"'{after}' is not a valid page.")
+    return cv, id
+
+
+def export_characters(character_name: str):
+    """Yield the owners of a character sorted by crit value, as rows ready to be exported"""
+    return (
+        Character.objects.filter(name=character_name).order_by("-cv", "id")
+        .values_list("owner__uid", "owner__nickname", "stat_hp", "stat_atk", "stat_def", "stat_er", "stat_em", "stat_cr", "stat_cd")
+        .iterator(chunk_size=EXPORT_CHUNK)
+    )
+
+
+def export_characters_batch(character_name: str, after: tuple | None = None) -> tuple[list, tuple | None]:
+    """Get the next owners of a character sorted by crit value, as rows ready to be exported, along with where to go on from"""
+    # NOTE: keyset pagination along the (name, -cv, id) index, so that no cursor stays open between two batches
+    characters = Character.objects.filter(name=character_name).order_by("-cv", "id")
+    if after is not None:
+        # NOTE: the cv__lte conjunct bounds the index range, the OR alone would be checked row by row
+        characters = characters.filter(Q(cv__lt=after[0]) | Q(id__gt=after[1]), cv__lte=after[0])
+    rows = list(characters.values_list("cv", "id", "owner__uid", "owner__nickname", "stat_hp", "stat_atk", "stat_def", "stat_er", "stat_em", "stat_cr", "stat_cd")[:EXPORT_CHUNK])
+    if len(rows) == 0:
+        return [], after
+    return [row[2:] for row in rows], rows[-1][:2]
+
+
+def get_cached_characters(name: str, version: tuple | None, size: int | None = None, after: str | None = None) -> dict:
+    """Same as get_characters, reusing the pages computed for this version of the character's owners"""
+    if version is None:
+        return get_characters(name, size=size, after=after)
+    # NOTE: only the characters an ingestion touched get a new version, the pages of the others stay cached
+    key = f"characters:{fingerprint(name, version[0], size, after)}"
+    obj = cache.get(key)
+    if obj is None:
+        obj = get_characters(name, size=size, after=after)
+        cache.set(key, obj)
+    return obj
+
+
+def get_characters(name: str, size: int | None = None, after: str | None = None) -> dict:
+    """Get the owners of a character sorted by crit value, a page of them if a size is given"""
     print(f"Getting characters for name {name}...")
-    characters = Character.objects.filter(name__iexact=name.replace("_", " ")).select_related("owner")
-    assert len(characters) > 0, f"It seems that no players have '{name}' in their showcase."
-    print(characters)
+    character_name = get_character_name(name)
+    assert character_name is not None, f"It seems that no players have '{name}' in their showcase."
+    # NOTE: sorted by the database along the (name, -cv, id) index, a page costs the same wherever it is
+    characters = Character.objects.filter(name=character_name).select_related("owner", "definition").order_by("-cv", "id")
+    if after is not None:
+        cv, id = parse_cursor(after)
+        characters = characters.filter(Q(cv__lt=cv) | Q(id__gt=id), cv__lte=cv)  # NOTE: see export_characters_batch
+    characters = list(characters if size is None else characters[:size + 1])
+    next_page = None
+    if size is not None and len(characters) > size:
+        characters = characters[:size]
+        next_page = f"{characters[-1].cv}_{characters[-1].id}"
     obj = {
-        "name": characters[0].name,
-        "icon": characters[0].icon,
+        "name": character_name,
+        "icon": characters[0].icon if characters else CharacterDefinition.objects.filter(name=character_name).values_list("icon", flat=True).first(),
         "characters": [],
+        "next": next_page,
     }
-    values_hp = [character.stat_hp for character in characters]
-    values_atk = [character.stat_atk for character in characters]
-    values_def = [character.stat_def for character in characters]
-    values_cr = [character.stat_cr for character in characters]
-    values_cd = [character.stat_cd for character in characters]
-    values_er = [character.stat_er for character in characters]
-    values_em = [character.stat_em for character in characters]
+    thresholds = get_quartiles(character_name)
     for character in characters:
         obj["characters"].append({
             "owner": {
@@ -616,34 +1548,32 @@ def get_characters(name: str) -> list:
             },
             "stat_hp": {
                 "value": character.stat_hp,
-                "style": get_style(character.stat_hp, values_hp),
+                "style": get_style(character.stat_hp, thresholds["stat_hp"]),
             },
             "stat_atk": {
                 "value": character.stat_atk,
-                "style": get_style(character.stat_atk, values_atk),
+                "style": get_style(character.stat_atk, thresholds["stat_atk"]),
             },
             "stat_def": {
                 "value": character.stat_def,
-                "style": get_style(character.stat_def, values_def),
+                "style": get_style(character.stat_def, thresholds["stat_def"]),
             },
             "stat_cr": {
                 "value": character.stat_cr,
-                "style": get_style(character.stat_cr, values_cr),
+                "style": get_style(character.stat_cr, thresholds["stat_cr"]),
             },
             "stat_cd": {
                 "value": character.stat_cd,
-                "style": get_style(character.stat_cd, values_cd),
+                "style": get_style(character.stat_cd, thresholds["stat_cd"]),
             },
             "stat_er": {
                 "value": character.stat_er,
-                "style": get_style(character.stat_er, values_er),
+                "style": get_style(character.stat_er, thresholds["stat_er"]),
             },
             "stat_em": {
                 "value": character.stat_em,
-                "style": get_style(character.stat_em, values_em),
+                "style": get_style(character.stat_em, thresholds["stat_em"]),
             },
-            "cv": character.stat_cd + 2 * character.stat_cr,
+            "cv": character.cv,
         })
-    # Sort by CV
-    obj["characters"].sort(key=lambda x: x["cv"], reverse=True)
     return obj
@@ -1,5 +1,7 @@
 from django import template
 
+from .. import gamedata
+
 register = template.Library()
 
 def strreplace(value, arg):
@@ -9,5 +11,9 @@ def strreplace(value, arg):
 def percentage(value):
     return str(value) + '%'
 
+def translate(value, arg):
+    return gamedata.translate(value, arg)
+
 register.filter('strreplace', strreplace)
 register.filter('percentage', percentage)
+register.filter('translate', translate)
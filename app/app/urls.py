@@ -1,18 +1,29 @@
+from django.conf import settings
 from django.urls import path, re_path
 from . import views
 
+if settings.ASYNC_VIEWS:  # NOTE: only under ASGI, whose event loop outlives requests and keeps refreshing players
+    inspect, inspectstats, inspectapi, inspectrandom = views.ainspect, views.ainspectstats, views.ainspectapi, views.ainspectrandom
+    chardownload = views.achardownload  # NOTE: streamed by an asynchronous iterator, which ASGI does not buffer
+else:
+    inspect, inspectstats, inspectapi, inspectrandom = views.inspect, views.inspectstats, views.inspectapi, views.inspectrandom
+    chardownload = views.chardownload
+
 urlpatterns = [
 
     path("", views.home),
-    re_path("^" + "uid/(?P<uid>[0-9]{9})/" + "$", views.inspect, name="inspect"),
-    re_path("^" + "uid/(?P<uid>[0-9]{9})/stats/" + "$", views.inspectstats),
-    re_path("^" + "api/(?P<uid>[0-9]{9})/" + "$", views.inspectapi),
+    re_path("^" + "uid/(?P<uid>[0-9]{9})/" + "$", inspect, name="inspect"),
+    re_path("^" + "uid/(?P<uid>[0-9]{9})/stats/" + "$", inspectstats),
+    re_path("^" + "api/(?P<uid>[0-9]{9})/" + "$", inspectapi),
+    path("api/batch/", views.batchapi),
     re_path("^" + "uid/(?P<uid1>[0-9]{9})/(?P<uid2>[0-9]{9})/" + "$", views.duel),
-    path("uid/random/", views.inspectrandom),
+    re_path("^" + "api/(?P<uid1>[0-9]{9})/(?P<uid2>[0-9]{9})/" + "$", views.duelapi),
+    path("uid/random/", inspectrandom),
     path("how/", views.how),
+    path("status/", views.status),
     path("char/<str:name>/", views.char),
     path("api/<str:name>/", views.charapi),
-    path("char/<str:name>/download/", views.chardownload),
+    path("char/<str:name>/download/", chardownload),
 
     # -------------------------
     # /!\ Easter eggs below /!\
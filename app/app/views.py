@@ -5,17 +5,88 @@ from .models import *
 # For 'random' search query
 from django.shortcuts import redirect
 from django.urls import reverse
-import random
 
 # For API
 from django.http import JsonResponse
 
 # For TSV export
 import csv
-from django.http import HttpResponse
+import zlib
+from django.http import StreamingHttpResponse
+
+# For background refreshes
+from django.conf import settings
+
+# For the batch API
+import re
+import json
+from django.views.decorators.csrf import csrf_exempt
+
+# For translated names
+from django.utils.cache import patch_vary_headers
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+# For async views
+from asgiref.sync import sync_to_async
+
+# For conditional requests
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 # For custom code
 from . import scripts
+from . import enka
+from . import negative
+from . import gamedata
+from . import scoring
+
+
+STILL_FETCHING_RETRY = 5  # Seconds after which a player's page should be requested again
+EXPORT_BUFFER = 64 * 1024  # Bytes of an export gathered before being sent
+EXPORT_FORMATS = {"tsv": ("\t", "text/tsv"), "csv": (",", "text/csv")}
+MAX_BATCH_UIDS = 100  # UIDs which can be asked for in a single call of the batch API
+
+
+def get_language(request) -> str:
+    """Pick the language in which names are shown, from the Accept-Language header"""
+    for lang, _ in parse_accept_lang_header(request.headers.get("Accept-Language", "")):
+        lang = lang.lower()
+        if lang in gamedata.LANGUAGES:
+            return lang
+        for candidate in gamedata.LANGUAGES:  # NOTE: 'pt-br' falls back to 'pt', 'zh' to 'zh-cn'
+            if candidate.split("-")[0] == lang.split("-")[0]:
+                return candidate
+    return gamedata.LANG
+
+
+def render_translated(request, template, context, lang):
+    response = render(request, template, context | {"lang": lang})
+    patch_vary_headers(response, ["Accept-Language"])
+    return response
+
+
+def get_validators(*values, updated) -> dict:
+    """Build the ETag and Last-Modified of a page from what its content depends on"""
+    # NOTE: weak, pages with the same ETag are equivalent but not identical ("Last updated ... ago" changes over time)
+    return {"etag": f'W/"{scripts.fingerprint(scoring.SCORING_VERSION, updated, *values)}"', "last_modified": int(updated.timestamp())}
+
+
+def not_modified(request, validators: dict | None, vary: bool = False):
+    """Answer 304 if the client already has this version of the page, before any of it is computed"""
+    if validators is None:
+        return None
+    response = get_conditional_response(request, **validators)
+    if response is not None:
+        return with_validators(response, validators, vary)
+    return None
+
+
+def with_validators(response, validators: dict, vary: bool = False):
+    response["ETag"] = validators["etag"]
+    response["Last-Modified"] = http_date(validators["last_modified"])
+    if vary:
+        patch_vary_headers(response, ["Accept-Language"])
+    return response
 
 
 def home(request):
@@ -25,68 +96,229 @@ def home(request):
     })
 
 
+def get_player_context(player: dict) -> dict:
+    """Context of the pages of a player, whose characters are only loaded if their rows were not cached"""
+    return player | {
+        "version": f"{player['version']}.{scoring.SCORING_VERSION}",
+        "characters": lambda: scripts.get_cached_player(player["uid"], player["version"])["characters"],  # NOTE: called by the template
+    }
+
+
 def inspect(request, uid):
     try:
-        scripts.add_player(uid)
+        state = scripts.ensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
     except AssertionError as e:
         return notfound(request, e)
-    obj = scripts.get_player(uid, include_rating=True)
+    return show_player(request, uid, state)
+
+
+async def ainspect(request, uid):
+    try:
+        state = await scripts.aensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
+    except AssertionError as e:
+        return await sync_to_async(notfound)(request, e)
+    return await sync_to_async(show_player)(request, uid, state)
+
+
+def show_player(request, uid, state):
+    if state == "pending":
+        return stillfetching(request, uid)
+    lang = get_language(request)
+    player = scripts.get_player_summary(uid)
+    validators = get_validators("base_table.html", uid, lang, state == "stale", updated=player["updated"])
+    response = not_modified(request, validators, vary=True)
+    if response is not None:
+        return response
+    obj = get_player_context(player)
     nickname = obj["nickname"]
     avatar_dict = {'image_url': obj["avatar"]}
-    return render(request, "base_table.html", obj | {
+    return with_validators(render_translated(request, "base_table.html", obj | {
         'title': nickname,
         'body': uid,
         "imagestyle": "w-32",
-    } | avatar_dict)
+        "refreshing": state == "stale",
+    } | avatar_dict, lang), validators)
 
 
 def inspectstats(request, uid):
     try:
-        scripts.add_player(uid)
+        state = scripts.ensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
     except AssertionError as e:
         return notfound(request, e)
-    obj = scripts.get_player(uid, include_rating=True)
+    return show_playerstats(request, uid, state)
+
+
+async def ainspectstats(request, uid):
+    try:
+        state = await scripts.aensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
+    except AssertionError as e:
+        return await sync_to_async(notfound)(request, e)
+    return await sync_to_async(show_playerstats)(request, uid, state)
+
+
+def show_playerstats(request, uid, state):
+    if state == "pending":
+        return stillfetching(request, uid)
+    lang = get_language(request)
+    player = scripts.get_player_summary(uid)
+    validators = get_validators("base_statstable.html", uid, lang, state == "stale", updated=player["updated"])
+    response = not_modified(request, validators, vary=True)
+    if response is not None:
+        return response
+    obj = get_player_context(player)
     nickname = obj["nickname"]
     if uid != '703047530':
         avatar_dict = {'image_url': obj["avatar"]}
     else:
         avatar_dict = {'image': 'eastereggs/soleil.png'}
-    return render(request, "base_statstable.html", obj | {
+    return with_validators(render_translated(request, "base_statstable.html", obj | {
         'title': nickname,
         'body': f"{uid}",
         "imagestyle": "w-32",
-    } | avatar_dict)
+        "refreshing": state == "stale",
+    } | avatar_dict, lang), validators)
 
 
 def inspectapi(request, uid):
     try:
-        scripts.add_player(uid)
+        state = scripts.ensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
     except AssertionError as e:
         return HttpResponseNotFound()
-    obj = scripts.get_player(uid, include_rating=False)
-    return JsonResponse(obj)
+    return show_playerapi(request, uid, state)
 
 
-def inspectrandom(request):
-    uid = random.randint(1e8, 1e9 - 1)
-    uid = str(uid)
-    uid = uid[0] + "0" + uid[2:]
-    uid = int(uid)
-    summary = scripts.interrogate_enka(uid, summary_only=True)
-    if "playerInfo" in summary and "showAvatarInfoList" in summary["playerInfo"]:
-        obj = scripts.interrogate_enka(uid)
-        if "avatarInfoList" in obj and isinstance(obj["avatarInfoList"], list):
-            # return inspect(request, uid)
-            return redirect(reverse("inspect", kwargs={"uid": uid}))
-    return inspectrandom(request)
+async def ainspectapi(request, uid):
+    try:
+        state = await scripts.aensure_player(uid, deadline=settings.PLAYER_FETCH_DEADLINE)
+    except AssertionError as e:
+        return HttpResponseNotFound()
+    return await sync_to_async(show_playerapi)(request, uid, state)
+
+
+def show_playerapi(request, uid, state):
+    if state == "pending":
+        response = JsonResponse({"uid": uid, "status": "pending"}, status=202)
+        response["Retry-After"] = str(STILL_FETCHING_RETRY)
+        return response
+    player = scripts.get_player_summary(uid)
+    validators = get_validators("api", uid, updated=player["updated"])
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    obj = scripts.get_cached_player(uid, player["version"]) | {"updated": player["updated"]}  # NOTE: refreshed without any change
+    return with_validators(JsonResponse(obj), validators)
+
+
+def get_uids(request) -> list[str]:
+    """Read the UIDs asked for, either as a JSON body {"uids": [...]} or as ?uids=...,..."""
+    if request.method == "POST":
+        try:
+            uids = json.loads(request.body)["uids"]
+        except (ValueError, TypeError, KeyError):
+            raise AssertionError('The body should be a JSON object such as {"uids": ["123456789"]}.')
+        assert isinstance(uids, list), "The UIDs should be given as a list."
+    else:
+        uids = [uid for value in request.GET.getlist("uids") for uid in value.split(",") if uid]
+    uids = list(dict.fromkeys(str(uid).strip() for uid in uids))
+    assert len(uids) > 0, "No UID was given."
+    assert len(uids) <= MAX_BATCH_UIDS, f"At most {MAX_BATCH_UIDS} UIDs can be asked for at once."
+    return uids
 
 
-def duel(request, uid1, uid2):
-    return render(request, "base_page_simpletext.html", {
-        "title": "You made Furina sad T-T",
-        "body": f"Coming soon...",
+@csrf_exempt
+def batchapi(request):
+    try:
+        uids = get_uids(request)
+    except AssertionError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    valid = [uid for uid in uids if re.fullmatch("[0-9]{9}", uid)]
+    states = scripts.ensure_players(valid, deadline=settings.PLAYER_FETCH_DEADLINE, limit=settings.BATCH_REFRESHES)
+    players = scripts.get_players([uid for uid, (state, _) in states.items() if state in ("cached", "refreshed", "refreshing")])
+    results = {}
+    for uid in uids:
+        state, error = states.get(uid, ("failed", f"'{uid}' is not a valid UID."))
+        if uid in players:
+            results[uid] = {"status": state, "player": players[uid]}
+        elif error is not None or state != "pending":
+            results[uid] = {"status": "failed", "error": error or f"No player seems to have the UID '{uid}'."}
+        else:
+            results[uid] = {"status": state}
+    response = JsonResponse({"players": results})
+    if any(result["status"] in ("pending", "refreshing") for result in results.values()):
+        response["Retry-After"] = str(STILL_FETCHING_RETRY)
+    return response
+
+
+def stillfetching(request, uid):
+    response = render(request, "base_page_simpletext.html", {
+        "title": "Furina is still looking for you...",
+        "body": f"Enka.Network is taking its time to answer for UID {uid}. This page will reload by itself.",
         "image": "sad.webp",
         "imagestyle": "w-32",
+        "reload": STILL_FETCHING_RETRY,
+    }, status=202)
+    response["Retry-After"] = str(STILL_FETCHING_RETRY)
+    return response
+
+
+def inspectrandom(request):
+    uid = scripts.pick_random_player()
+    if uid is None:
+        return notfound(request, "Furina could not find anyone to judge, please try again later.")
+    return redirect(reverse("inspect", kwargs={"uid": uid}))
+
+
+async def ainspectrandom(request):
+    uid = await scripts.apick_random_player()
+    if uid is None:
+        return await sync_to_async(notfound)(request, "Furina could not find anyone to judge, please try again later.")
+    return redirect(reverse("inspect", kwargs={"uid": uid}))
+
+
+def duel(request, uid1, uid2):
+    if uid1 == uid2:
+        return notfound(request, "Furina cannot judge a player against themselves.")
+    # NOTE: both players are refreshed at the same time, waiting only for the slower of the two
+    states = scripts.ensure_players([uid1, uid2], deadline=settings.PLAYER_FETCH_DEADLINE)
+    for uid, (state, error) in states.items():
+        if state == "failed":
+            return notfound(request, error)
+        if state == "pending":
+            return stillfetching(request, uid)
+    try:
+        obj = scripts.get_duel(uid1, uid2)
+    except AssertionError as e:
+        return notfound(request, e)
+    return render_translated(request, "base_table_duel.html", obj | {
+        "title": f"{obj['player1']['nickname']} vs {obj['player2']['nickname']}",
+        "body": f"{obj['wins'][0]} - {obj['wins'][1]}",
+        "refreshing": any(state == "refreshing" for state, _ in states.values()),
+    }, get_language(request))
+
+
+def duelapi(request, uid1, uid2):
+    if uid1 == uid2:
+        return HttpResponseNotFound()
+    states = scripts.ensure_players([uid1, uid2], deadline=settings.PLAYER_FETCH_DEADLINE)
+    if any(state == "failed" for state, _ in states.values()):
+        return HttpResponseNotFound()
+    if any(state == "pending" for state, _ in states.values()):
+        response = JsonResponse({"uids": [uid1, uid2], "status": "pending"}, status=202)
+        response["Retry-After"] = str(STILL_FETCHING_RETRY)
+        return response
+    try:
+        obj = scripts.get_duel(uid1, uid2)
+    except AssertionError as e:
+        return HttpResponseNotFound()
+    return JsonResponse(obj)
+
+
+def status(request):
+    return JsonResponse({
+        "enka": enka.stats(),
+        "cache": scripts.CACHE_STATS,
+        "random": scripts.RANDOM_STATS | {"pool": len(scripts.RANDOM_POOL)},
+        "negative": negative.STATS,
     })
 
 
@@ -119,52 +351,145 @@ def how(request):
     })
     
 
+def get_page(request) -> tuple[int, str | None]:
+    """Read the size of a page and the cursor it starts after from the query string"""
+    try:
+        size = int(request.GET.get("size", scripts.PAGE_SIZE))
+    except ValueError:
+        raise AssertionError("The size of a page should be a number.")
+    assert 1 <= size <= scripts.MAX_PAGE_SIZE, f"Pages hold between 1 and {scripts.MAX_PAGE_SIZE} players."
+    return size, request.GET.get("after")
+
+
+def find_character(name: str) -> tuple[str, tuple | None]:
+    """Resolve the name of a character from an URL, along with the version of its owners"""
+    character_name = scripts.get_character_name(name)
+    if character_name is None:
+        return name, None  # NOTE: unknown characters are answered as usual, by get_characters
+    return character_name, scripts.get_character_version(character_name)
+
+
+def get_character_validators(character_name: str, version: tuple | None, *values) -> dict | None:
+    if version is None:
+        return None
+    return get_validators(character_name, version[0], *values, updated=version[1])
+
+
 def char(request, name):
+    lang = get_language(request)
+    character_name, version = find_character(name)
+    validators = get_character_validators(character_name, version, "base_chartable.html", lang)
+    response = not_modified(request, validators, vary=True)
+    if response is not None:
+        return response
     try:
-        characters = scripts.get_characters(name)
+        size, after = get_page(request)
+        characters = scripts.get_cached_characters(character_name, version, size=size, after=after)
     except AssertionError as e:
         return notfound(request, e)
-    return render(request, "base_chartable.html", {
-        'title': characters['name'],
+    response = render_translated(request, "base_chartable.html", {
+        'title': gamedata.translate(characters['name'], lang),
         'characters': characters,
         "image_url": characters['icon'],
         "imagestyle": "w-32",
         "zoom": True,
-    })
+        "size": size,
+        "after": after,
+    }, lang)
+    return with_validators(response, validators) if validators is not None else response
 
 
 def charapi(request, name):
+    character_name, version = find_character(name)
+    validators = get_character_validators(character_name, version, "api")
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
     try:
-        characters = scripts.get_characters(name)
+        size, after = get_page(request)
+        characters = scripts.get_cached_characters(character_name, version, size=size, after=after)
     except AssertionError as e:
         return HttpResponseNotFound()
-    return JsonResponse(characters)
+    response = JsonResponse(characters)
+    return with_validators(response, validators) if validators is not None else response
+
+
+class Echo:
+    """File-like object giving back what is written to it, so that csv.writer produces lines one by one"""
+    def write(self, value):
+        return value
+
+
+class ExportEncoder:
+    """Turn rows into the bytes of an export, gathered into chunks of about EXPORT_BUFFER bytes"""
+    def __init__(self, delimiter: str, compress: bool):
+        self.writer = csv.writer(Echo(), delimiter=delimiter)
+        self.compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None  # NOTE: 16 selects the gzip format
+        self.lines = [self.writer.writerow(["owner_uid", "owner_name", "stat_hp", "stat_atk", "stat_def", "stat_er", "stat_em", "stat_cr", "stat_cd"])]
+        self.size = 0
+
+    def write(self, row) -> bytes | None:
+        """Add a row, giving back a chunk once enough of them were gathered"""
+        self.lines.append(self.writer.writerow(row))
+        self.size += len(self.lines[-1])
+        if self.size < EXPORT_BUFFER:
+            return None
+        chunk = "".join(self.lines).encode()
+        self.lines, self.size = [], 0
+        return self.compressor.compress(chunk) if self.compressor else chunk
+
+    def close(self) -> bytes:
+        chunk = "".join(self.lines).encode()
+        return self.compressor.compress(chunk) + self.compressor.flush() if self.compressor else chunk
+
+
+def stream_export(character_name: str, delimiter: str, compress: bool):
+    encoder = ExportEncoder(delimiter, compress)
+    for row in scripts.export_characters(character_name):
+        chunk = encoder.write(row)
+        if chunk is not None:
+            yield chunk
+    yield encoder.close()
+
+
+async def astream_export(character_name: str, delimiter: str, compress: bool):
+    # NOTE: under ASGI, a synchronous iterator would be read whole before anything is sent
+    encoder = ExportEncoder(delimiter, compress)
+    after = None
+    while True:
+        rows, after = await sync_to_async(scripts.export_characters_batch)(character_name, after)
+        if len(rows) == 0:
+            break
+        for row in rows:
+            chunk = encoder.write(row)
+            if chunk is not None:
+                yield chunk
+    yield encoder.close()
+
+
+def export_response(request, name: str, character_name: str | None, stream):
+    """Send the owners of a character as a file, turned into chunks by `stream` (stream_export or astream_export)"""
+    export_format = request.GET.get("format", "tsv")
+    if character_name is None or export_format not in EXPORT_FORMATS:
+        return HttpResponseNotFound()
+    delimiter, content_type = EXPORT_FORMATS[export_format]
+    compress = request.GET.get("gzip") in ("1", "true")
+    filename = f"{name}.{export_format}" + (".gz" if compress else "")
+    # NOTE: rows go from the database to the client chunk by chunk, whatever the number of owners
+    return StreamingHttpResponse(
+        stream(character_name, delimiter, compress),
+        content_type="application/gzip" if compress else content_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 def chardownload(request, name):
-    try:
-        characters = scripts.get_characters(name)
-    except AssertionError as e:
-        return HttpResponseNotFound()
-    response = HttpResponse(
-        content_type="text/tsv",
-        headers={"Content-Disposition": f'attachment; filename="{name}.tsv"'},
-    )
-    writer = csv.writer(response, delimiter="\t")
-    writer.writerow(["owner_uid", "owner_name", "stat_hp", "stat_atk", "stat_def", "stat_er", "stat_em", "stat_cr", "stat_cd"])
-    for entry in characters['characters']:
-        writer.writerow([
-            entry['owner']['uid'],
-            entry['owner']['name'],
-            entry['stat_hp']['value'],
-            entry['stat_atk']['value'],
-            entry['stat_def']['value'],
-            entry['stat_er']['value'],
-            entry['stat_em']['value'],
-            entry['stat_cr']['value'],
-            entry['stat_cd']['value'],
-        ])
-    return response
+    return export_response(request, name, scripts.get_character_name(name), stream_export)
+
+
+async def achardownload(request, name):
+    character_name = await sync_to_async(scripts.get_character_name)(name)
+    return export_response(request, name, character_name, astream_export)
 
 
 # -------------------------
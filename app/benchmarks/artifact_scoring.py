@@ -0,0 +1,101 @@
+"""
+Compare rating artifacts one by one with scripts.rate_artifact and in
+batches with scoring.rate_artifacts, on randomly generated artifacts, and
+check that both give exactly the same ratings.
+
+Run it from the `app` folder (in which there is `manage.py`) using
+    python benchmarks/artifact_scoring.py [number of artifacts ...]
+"""
+
+import os
+import sys
+import time
+import random
+import decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+
+import django
+django.setup()
+
+from app import scripts
+from app import scoring
+
+
+SIZES = [10_000, 1_000_000]
+CHUNK = 10_000  # Artifacts generated at once, so that a million of them never sit in memory as objects
+EQUIPTYPES = ["Flower", "Feather", "Sands", "Goblet", "Circlet"]
+MAINSTATS = {
+    "Flower": ["Flat HP"],
+    "Feather": ["Flat ATK"],
+    "Sands": ["HP%", "ATK%", "DEF%", "Energy Recharge", "Elemental Mastery"],
+    "Goblet": ["HP%", "ATK%", "DEF%", "Elemental Mastery", "Pyro DMG Bonus", "Physical DMG Bonus"],
+    "Circlet": ["HP%", "ATK%", "DEF%", "Elemental Mastery", "Crit RATE", "Crit DMG", "Healing Bonus"],
+}
+ROLL_VALUES = {  # Rough value of a roll, only used to make up realistic numbers
+    "Flat HP": 269, "Flat ATK": 17.5, "Flat DEF": 20.8, "HP%": 5.3, "ATK%": 5.3, "DEF%": 6.6,
+    "Elemental Mastery": 21, "Energy Recharge": 5.8, "Crit RATE": 3.5, "Crit DMG": 7.0,
+}
+
+
+def generate(count: int, rng: random.Random) -> list:
+    artifacts = []
+    for _ in range(count):
+        equiptype = rng.choice(EQUIPTYPES)
+        mainstat = rng.choice(MAINSTATS[equiptype])
+        names = rng.sample([name for name in ROLL_VALUES if name != mainstat], rng.choice([3, 4, 4, 4]))
+        rolls = [1] * len(names)
+        for _ in range(rng.randint(3, 5)):
+            rolls[rng.randrange(len(names))] += 1
+        stats = [SimpleNamespace(name=mainstat, value=decimal.Decimal("46.6"), rolls=0)]
+        for name, count_ in zip(names, rolls):
+            value = sum(ROLL_VALUES[name] * rng.uniform(0.7, 1.0) for _ in range(count_))
+            stats.append(SimpleNamespace(name=name, value=decimal.Decimal(f"{value:.1f}"), rolls=count_))
+        artifacts.append((SimpleNamespace(equiptype=equiptype), stats))
+    return artifacts
+
+
+def one_by_one(artifacts: list) -> list:
+    return [scripts.rate_artifact(artifact, mainstat=stats[0], substats=stats[1:]) for artifact, stats in artifacts]
+
+
+def flatten(artifacts: list) -> tuple:
+    owners, names, values, rolls = [], [], [], []
+    for i, (_, stats) in enumerate(artifacts):
+        for stat in stats:
+            owners.append(i)
+            names.append(stat.name)
+            values.append(stat.value)
+            rolls.append(stat.rolls)
+    return [artifact.equiptype for artifact, _ in artifacts], owners, names, values, rolls
+
+
+def benchmark(size: int) -> None:
+    rng = random.Random(size)
+    timings = {"one by one": 0.0, "batch (arrays)": 0.0, "batch (ratings)": 0.0}
+    mismatches = 0
+    for start in range(0, size, CHUNK):
+        artifacts = generate(min(CHUNK, size - start), rng)
+        equiptypes, owners, names, values, rolls = flatten(artifacts)
+        t0 = time.perf_counter()
+        expected = one_by_one(artifacts)
+        t1 = time.perf_counter()
+        table = scoring.tabulate(owners, names, values, rolls, len(equiptypes))
+        scores = scoring.score(table, [equiptype == "Circlet" for equiptype in equiptypes])
+        t2 = time.perf_counter()
+        ratings = scoring.describe(scores)
+        t3 = time.perf_counter()
+        timings["one by one"] += t1 - t0
+        timings["batch (arrays)"] += t2 - t1
+        timings["batch (ratings)"] += t3 - t1
+        mismatches += sum(a != b for a, b in zip(expected, ratings))
+    print(f"{size:,} artifacts ({mismatches} mismatches)")
+    for name, seconds in timings.items():
+        print(f"    {name:<18}{seconds:>9.3f} s{size / seconds:>14,.0f} artifacts/s")
+
+
+if __name__ == "__main__":
+    for size in [int(arg) for arg in sys.argv[1:]] or SIZES:
+        benchmark(size)
@@ -0,0 +1,100 @@
+"""
+Load test comparing the synchronous and asynchronous versions of the player
+API when Enka.Network is slow. A fake Enka.Network answering after a fixed
+delay is started locally, then the same number of never seen UIDs is asked
+for through the sync views (from a pool of threads, as a threaded WSGI
+server would) and through the async views (from a single event loop, as an
+ASGI worker would). Players are written in a throwaway database.
+
+Run it from the `app` folder (in which there is `manage.py`) using
+    python benchmarks/async_inspect.py [requests] [latency in seconds]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+
+import django
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import setup_test_environment
+
+from app import scripts
+from app import views
+
+
+REQUESTS = 200
+LATENCY = 0.5  # Seconds taken by the fake Enka.Network to answer
+THREADS = 8  # Threads of the synchronous server
+PAYLOAD = json.dumps({"playerInfo": {"nickname": "Bench", "profilePicture": {}}, "avatarInfoList": [], "ttl": 600}).encode()
+
+
+async def answer(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float) -> None:
+    while True:  # NOTE: connections are kept alive, as by Enka.Network
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            break
+        await asyncio.sleep(latency)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(PAYLOAD), PAYLOAD))
+        await writer.drain()
+    writer.close()
+
+
+def start_fake_enka(latency: float) -> int:
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(
+        lambda reader, writer: answer(reader, writer, latency), "127.0.0.1", 0, backlog=1024, limit=2 ** 16,
+    ))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+
+def run_sync(uids: list[str]) -> list[int]:
+    factory = RequestFactory()
+    def call(uid):
+        try:
+            return views.inspectapi(factory.get(f"/api/{uid}/"), uid).status_code
+        finally:
+            connection.close()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        return list(executor.map(call, uids))
+
+
+async def run_async(uids: list[str]) -> list[int]:
+    factory = AsyncRequestFactory()
+    responses = await asyncio.gather(*[views.ainspectapi(factory.get(f"/api/{uid}/"), uid) for uid in uids])
+    return [response.status_code for response in responses]
+
+
+def benchmark(name: str, run, uids: list[str]) -> None:
+    start = time.perf_counter()
+    statuses = run(uids)
+    elapsed = time.perf_counter() - start
+    ok = sum(status == 200 for status in statuses)
+    print(f"    {name:<6}{elapsed:>8.2f} s{len(uids) / elapsed:>10.1f} requests/s ({ok} answered, {len(uids) - ok} still fetching)")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY
+    setup_test_environment()
+    folder = tempfile.mkdtemp()
+    connection.settings_dict["TEST"]["NAME"] = os.path.join(folder, "benchmark.sqlite3")  # NOTE: a file, shared by the threads
+    connection.creation.create_test_db(verbosity=0)
+    scripts.BASE_URL = f"http://127.0.0.1:{start_fake_enka(latency)}/api/uid"
+    settings.PLAYER_FETCH_DEADLINE = 60  # NOTE: every request waits for its player, so that both measure the same work
+    print(f"{requests} new players, Enka.Network answering in {latency} s, {THREADS} threads or 1 event loop")
+    benchmark("sync", run_sync, [str(100000000 + i) for i in range(requests)])
+    benchmark("async", lambda uids: asyncio.run(run_async(uids)), [str(200000000 + i) for i in range(requests)])
@@ -0,0 +1,58 @@
+"""
+Compare what a worker pays to get the names of the characters, when loading
+the whole of loc.json (as it used to be done) or only the languages in use.
+
+Run it from the `app` folder (in which there is `manage.py`) using
+    python benchmarks/loc_loading.py
+"""
+
+import sys
+import json
+import subprocess
+
+
+RUNS = 5
+SCENARIOS = {
+    "eager (all languages)": """
+with open("constants/loc.json", encoding="utf8") as f:
+    LOC = json.load(f)
+names = LOC["en"]
+""",
+    "lazy (en only)": """
+from app import gamedata
+names = gamedata.get_loc("en")
+""",
+    "lazy (en + 2 languages)": """
+from app import gamedata
+names = [gamedata.get_loc(lang) for lang in ("en", "fr", "ja")]
+""",
+}
+MEASURE = """
+import json, time, tracemalloc, resource
+tracemalloc.start()
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({{"seconds": elapsed, "current": current, "peak": peak, "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def measure(code: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", MEASURE.format(code=code)], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    measure(SCENARIOS["lazy (en only)"])  # NOTE: builds the snapshots, if they are missing or outdated
+    print(f"{'scenario':<26}{'load (ms)':>12}{'retained (KiB)':>16}{'peak (KiB)':>12}{'max RSS (MiB)':>15}")
+    for name, code in SCENARIOS.items():
+        results = [measure(code) for _ in range(RUNS)]
+        best = min(results, key=lambda result: result["seconds"])
+        print(
+            f"{name:<26}"
+            f"{1000 * best['seconds']:>12.1f}"
+            f"{best['current'] / 1024:>16.0f}"
+            f"{best['peak'] / 1024:>12.0f}"
+            f"{min(result['maxrss'] for result in results) / 1024:>15.1f}"
+        )
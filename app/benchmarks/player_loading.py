@@ -0,0 +1,54 @@
+"""
+Check that scripts.get_player loads a player in a fixed number of queries,
+however many characters it has, and time it. Players are generated in a
+throwaway in-memory database, the real one is never touched.
+
+Run it from the `app` folder (in which there is `manage.py`) using
+    python benchmarks/player_loading.py
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_project.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from app import scripts
+from app.models import Player
+from app.tests import generate_character
+
+
+EXPECTED_QUERIES = 4  # Player, characters, artifacts and stats
+SIZES = [1, 8, 40, 200]  # Characters per player
+RUNS = 20
+
+
+def benchmark(size: int) -> None:
+    rng = random.Random(size)
+    uid = str(100000000 + size)
+    player = Player.objects.create(uid=uid, nickname=f"Bench {size}")
+    scripts.write_characters(player, [generate_character(f"Character {i}", rng) for i in range(size)])
+    timings = []
+    for _ in range(RUNS):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            scripts.get_player(uid)
+            timings.append(time.perf_counter() - start)
+        assert len(queries) == EXPECTED_QUERIES, f"{len(queries)} queries to load {size} characters, instead of {EXPECTED_QUERIES}"
+    timings.sort()
+    print(f"{size:>4} characters: {len(queries)} queries, {1000 * timings[len(timings) // 2]:.1f} ms (median of {RUNS})")
+
+
+if __name__ == "__main__":
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)  # NOTE: in memory with SQLite
+    for size in SIZES:
+        benchmark(size)
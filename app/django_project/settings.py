@@ -89,6 +89,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Rendered players are kept under their version, entries are only evicted to make room (least recently used
+# first in memory, culled when full on disk, by the server's own policy for Redis or Memcached)
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.environ.get('CACHE_LOCATION', {
+            "locmem": "court-of-fontaine",
+            "file": str(BASE_DIR.parent / "db" / "cache"),
+            "redis": "redis://127.0.0.1:6379",
+            "memcached": "127.0.0.1:11211",
+        }[CACHE_BACKEND]),
+        "TIMEOUT": int(os.environ.get('CACHE_TIMEOUT', 7 * 24 * 3600)),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get('CACHE_MAX_ENTRIES', 5000))} if CACHE_BACKEND in ("locmem", "file") else {},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -133,4 +161,22 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 DEBUG_TOOLBAR_CONFIG = {
     'SHOW_TOOLBAR_CALLBACK': lambda request: DEBUG,
-}
\ No newline at end of file
+}
+
+# Refreshing players
+# Pages of known players are served right away while they are refreshed in the background
+# by at most REFRESH_WORKERS threads. Players seen for the first time are waited for at most
+# PLAYER_FETCH_DEADLINE seconds before a "still fetching" page is returned instead. A single call
+# of the batch API starts at most BATCH_REFRESHES refreshes, so that it cannot starve the others.
+
+REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', 8))
+PLAYER_FETCH_DEADLINE = float(os.environ.get('PLAYER_FETCH_DEADLINE', 8))
+BATCH_REFRESHES = int(os.environ.get('BATCH_REFRESHES', REFRESH_WORKERS // 2 or 1))
+
+# Serving players asynchronously
+# With ASYNC_VIEWS (set by default by django_project/asgi.py), player pages wait for Enka.Network
+# in the event loop instead of in a thread, so that a single worker can wait for many of them.
+
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+if ASYNC_VIEWS:  # The toolbar's middleware is synchronous, requests would each hold a thread again
+    MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")